@@ -0,0 +1,24 @@
+"""Write PyArrow tables in the csv module's CSV format
+
+pyarrow.csv.write_csv quotes the header and every string value, and even its
+"needed" quoting style writes empty strings as "", which COPY ... CSV loads as
+'' rather than NULL. The cleaners that build PyArrow tables also have
+csv-module or pandas outputs to match, so their tables are formatted with
+csv.writer instead. Values are only quoted when they contain a delimiter,
+quote or newline. Nulls and empty strings are written as unquoted empty
+fields, booleans as True/False, and dates and timestamps in ISO form.
+"""
+import csv
+import gzip
+
+# Rows converted to Python values at a time, so memory stays bounded
+BATCH_ROWS = 65_536
+
+def write_table(tbl, path, lineterminator="\r\n"):
+    """Write tbl to path as CSV; a path ending in .gz is gzip-compressed"""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh, lineterminator=lineterminator)
+        writer.writerow(tbl.column_names)
+        for batch in tbl.to_batches(max_chunksize=BATCH_ROWS):
+            writer.writerows(zip(*(column.to_pylist() for column in batch.columns)))
@@ -1,162 +1,237 @@
-import pandas as pd
-import numpy as np
+import csv
+import logging
 import os
+import random
+from datetime import date, datetime
+from functools import lru_cache
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from arrow_csv import write_table
+
+logger = logging.getLogger(__name__)
+
+FOC_CLEANED = "/import/country_iso_foc_cleaned.csv"
+ILO_CLEANED = "/import/country_iso_ILO_c188_cleaned.csv"
+
+# Large read blocks let PyArrow tokenize the CSV in parallel chunks
+READ_OPTIONS = pacsv.ReadOptions(block_size=8 << 20)
+
+# Values accepted as true for the FOC / C188 flags, compared lowercased and trimmed
+TRUE_TOKENS = ('true', '1', 't', 'yes')
+
+# Handle date fields with flexible column naming: target -> accepted source names
+DATE_FIELD_SOURCES = {
+    'date_entered_force': ['dateEnteredForce', 'date_entered_force'],
+    'date_ratified': ['dateRatified', 'date_ratified'],
+    'date_future_enter_force_by': ['dateFutureEnterForceBy', 'date_future_enter_force_by']
+}
+
+# Handle optional string fields with flexible column naming: target -> accepted source names
+STRING_FIELD_SOURCES = {
+    'convention_org': ['conventionOrg', 'convention_org'],
+    'convention_shortname': ['convention_shortname'],
+    'convention_fullname': ['convention_fullname']
+}
+
+# Opt-in shortcut for inputs known to be unique upstream: on tables larger than
+# DEDUPE_SAMPLE_ROWS, a random sample of that many rows is checked first and the
+# full dedupe only runs if the sample contains duplicates. Off by default, since a
+# clean sample does not prove the whole table is unique.
+SAMPLED_DEDUPE = os.environ.get("EBISU_SAMPLED_DEDUPE", "").strip().lower() in TRUE_TOKENS
+DEDUPE_SAMPLE_ROWS = 20_000
+
+def parse_dates(values):
+    """Parse YYYY-MM-DD strings to dates, parsing each distinct string only once
+
+    Treaty dates repeat across countries, so the column is dictionary encoded and
+    only the dictionary is parsed, with parse_date_text. Unparseable or impossible
+    dates (e.g. 2024-02-30) become null; pc.strptime would roll those over into
+    the next month.
+    """
+    encoded = pc.dictionary_encode(values.combine_chunks())
+    texts = (parse_date_text(value) if value is not None else '' for value in encoded.dictionary.to_pylist())
+    parsed = pa.array([date.fromisoformat(text) if text else None for text in texts], type=pa.date32())
+    return pc.take(parsed, encoded.indices)
+
+def parse_flags(values):
+    """Map flag strings to booleans: TRUE_TOKENS are true, anything else (including null) is false"""
+    return pc.is_in(pc.utf8_lower(pc.utf8_trim_whitespace(values)), value_set=pa.array(TRUE_TOKENS))
+
+def drop_duplicate_rows(tbl):
+    """Drop duplicate rows by hashing all columns, keeping first occurrences in input order"""
+    if SAMPLED_DEDUPE and tbl.num_rows > DEDUPE_SAMPLE_ROWS:
+        sample = tbl.take(random.Random(0).sample(range(tbl.num_rows), DEDUPE_SAMPLE_ROWS))
+        if sample.group_by(sample.column_names).aggregate([]).num_rows == sample.num_rows:
+            return tbl
+    # Single-threaded grouping keeps groups in first-seen order, like drop_duplicates()
+    deduped = tbl.group_by(tbl.column_names, use_threads=False).aggregate([])
+    return deduped.select(tbl.column_names)
+
+def report_code_conflicts(tbl, label):
+    """Warn about countries that still have more than one row after dedupe
+
+    Rows are deduped on every column, so conflicting rows for the same
+    alpha_3_code are kept for review rather than merged.
+    """
+    counts = tbl.group_by('alpha_3_code').aggregate([('alpha_3_code', 'count')])
+    conflicts = counts.filter(pc.greater(counts['alpha_3_code_count'], 1))['alpha_3_code']
+    if len(conflicts) > 0:
+        print(f"   ⚠️  {len(conflicts)} {label} countries have conflicting records: {conflicts.to_pylist()}")
+
+@lru_cache(maxsize=None)
+def parse_date_text(value):
+    """Parse a YYYY-MM-DD string to ISO text, or '' if it is not a valid date"""
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return ''
 
 def clean_country_iso_foc():
-    """Clean country_iso_foc.csv - remove manual ID generation, let DB handle UUIDs"""
+    """Clean country_iso_foc.csv - remove manual ID generation, let DB handle UUIDs
+
+    Returns (path, columns, row_count) for the cleaned file.
+    """
     print("🧼 Cleaning country_iso_foc.csv...")
     
     try:
-        df = pd.read_csv("/import/country_iso_foc.csv")
+        tbl = pacsv.read_csv(
+            "/import/country_iso_foc.csv",
+            read_options=READ_OPTIONS,
+            convert_options=pacsv.ConvertOptions(column_types={
+                'alpha_3_code': pa.string(),
+                'isFOC': pa.string(),
+                'is_foc': pa.string()
+            })
+        )
         
         # NO LONGER ADD MANUAL ID - database will generate UUID
         # NO LONGER MAP TO country_id integers - use alpha_3_code for UUID lookup in SQL
         
-        # Clean string field
-        df['alpha_3_code'] = df['alpha_3_code'].astype(str).str.strip()
-        
         # Standardize boolean field name and clean it
         # Handle both possible column names for flexibility
         foc_column = None
-        if 'isFOC' in df.columns:
+        if 'isFOC' in tbl.column_names:
             foc_column = 'isFOC'
-        elif 'is_foc' in df.columns:
+        elif 'is_foc' in tbl.column_names:
             foc_column = 'is_foc'
         else:
             raise ValueError("FOC status column not found (looking for 'isFOC' or 'is_foc')")
         
-        # Standardize to 'is_foc' and clean boolean field
-        df['is_foc'] = df[foc_column].astype(bool)
-        
         # Keep only essential columns for SQL import (UUID mapping will happen in SQL)
-        df = df[['alpha_3_code', 'is_foc']]
+        # Clean string field and standardize to 'is_foc'
+        tbl = pa.table({
+            'alpha_3_code': pc.utf8_trim_whitespace(tbl['alpha_3_code']),
+            'is_foc': parse_flags(tbl[foc_column])
+        })
         
         # Remove any duplicates
-        original_count = len(df)
-        df = df.drop_duplicates()
-        if len(df) < original_count:
-            print(f"   🔧 Removed {original_count - len(df)} duplicate records")
+        original_count = tbl.num_rows
+        tbl = drop_duplicate_rows(tbl)
+        if tbl.num_rows < original_count:
+            print(f"   🔧 Removed {original_count - tbl.num_rows} duplicate records")
+        report_code_conflicts(tbl, 'FOC')
         
         # Save cleaned file
-        df.to_csv("/import/country_iso_foc_cleaned.csv", index=False)
-        print(f"✅ Cleaned country_iso_foc.csv: {len(df)} records")
-        print(f"📋 Sample data: {df.head(2).to_dict('records')}")
+        write_table(tbl, FOC_CLEANED, lineterminator='\n')
+        print(f"✅ Cleaned country_iso_foc.csv: {tbl.num_rows} records")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📋 Sample data: %s", tbl.slice(0, 2).to_pylist())
         print("🔄 UUID mapping will be handled during SQL import phase")
-        return df
+        return FOC_CLEANED, tbl.column_names, tbl.num_rows
         
-    except Exception as e:
-        print(f"❌ Error cleaning country_iso_foc.csv: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Error cleaning country_iso_foc.csv")
         raise
 
 def clean_country_iso_ilo_c188():
-    """Clean country_iso_ILO_c188.csv - remove manual ID generation, handle dates properly"""
+    """Clean country_iso_ILO_c188.csv - remove manual ID generation, handle dates properly
+
+    Returns (path, columns, row_count) for the cleaned file.
+    """
     print("🧼 Cleaning country_iso_ILO_c188.csv...")
     
     try:
-        df = pd.read_csv("/import/country_iso_ILO_c188.csv")
+        # Read flags, dates and strings as raw text so they are parsed and cleaned explicitly below
+        column_types = {'alpha_3_code': pa.string(), 'isC188ratified': pa.string(), 'is_c188_ratified': pa.string()}
+        for sources in (*DATE_FIELD_SOURCES.values(), *STRING_FIELD_SOURCES.values()):
+            column_types.update({name: pa.string() for name in sources})
+        tbl = pacsv.read_csv(
+            "/import/country_iso_ILO_c188.csv",
+            read_options=READ_OPTIONS,
+            convert_options=pacsv.ConvertOptions(column_types=column_types)
+        )
         
         # NO LONGER ADD MANUAL ID - database will generate UUID
         # NO LONGER MAP TO country_id integers - use alpha_3_code for UUID lookup in SQL
         
-        # Clean string field
-        df['alpha_3_code'] = df['alpha_3_code'].astype(str).str.strip()
-        
         # Standardize boolean field name and clean it
         # Handle both possible column names for flexibility
         ratified_column = None
-        if 'isC188ratified' in df.columns:
+        if 'isC188ratified' in tbl.column_names:
             ratified_column = 'isC188ratified'
-        elif 'is_c188_ratified' in df.columns:
+        elif 'is_c188_ratified' in tbl.column_names:
             ratified_column = 'is_c188_ratified'
         else:
             raise ValueError("C188 ratification column not found (looking for 'isC188ratified' or 'is_c188_ratified')")
         
-        # Standardize to 'is_c188_ratified'
-        df['is_c188_ratified'] = df[ratified_column].astype(bool)
-        
-        # Handle date fields with flexible column naming
-        date_field_mapping = {
-            'dateEnteredForce': 'date_entered_force',
-            'date_entered_force': 'date_entered_force',
-            'dateRatified': 'date_ratified', 
-            'date_ratified': 'date_ratified',
-            'dateFutureEnterForceBy': 'date_future_enter_force_by',
-            'date_future_enter_force_by': 'date_future_enter_force_by'
+        # Clean string field and standardize to 'is_c188_ratified'
+        columns = {
+            'alpha_3_code': pc.utf8_trim_whitespace(tbl['alpha_3_code']),
+            'is_c188_ratified': parse_flags(tbl[ratified_column])
         }
         
-        # Process date fields - handle all date columns
-        date_columns_processed = []
-        for old_name, new_name in date_field_mapping.items():
-            if old_name in df.columns and new_name not in date_columns_processed:
-                print(f"   📅 Processing date field: {old_name} -> {new_name}")
-                # Convert to datetime, handle errors gracefully
-                df[new_name] = pd.to_datetime(df[old_name], format='%Y-%m-%d', errors='coerce')
-                # Convert NaT to None for SQL compatibility
-                df[new_name] = df[new_name].where(pd.notnull(df[new_name]), None)
-                date_columns_processed.append(new_name)
-        
-        # Handle optional string fields with flexible column naming
-        string_field_mapping = {
-            'conventionOrg': 'convention_org',
-            'convention_org': 'convention_org',
-            'convention_shortname': 'convention_shortname',
-            'convention_fullname': 'convention_fullname'
-        }
+        # Process date fields - first matching source column per target
+        for new_name, sources in DATE_FIELD_SOURCES.items():
+            old_name = next((name for name in sources if name in tbl.column_names), None)
+            if old_name is None:
+                continue
+            logger.debug("   📅 Processing date field: %s -> %s", old_name, new_name)
+            # Convert to date, unparseable values become null for SQL compatibility
+            columns[new_name] = parse_dates(tbl[old_name])
         
-        # Process string fields - handle all string columns
-        string_columns_processed = []
-        for old_name, new_name in string_field_mapping.items():
-            if old_name in df.columns and new_name not in string_columns_processed:
-                print(f"   📝 Processing string field: {old_name} -> {new_name}")
-                # Clean and handle empty strings
-                df[new_name] = df[old_name].astype(str).str.strip()
-                df[new_name] = df[new_name].replace(['', 'nan', 'NaN'], None)
-                string_columns_processed.append(new_name)
-        
-        # Build columns to keep (only include columns that exist)
-        columns_to_keep = ['alpha_3_code', 'is_c188_ratified']
-        
-        # Add optional columns if they were processed
-        optional_columns = [
-            'date_entered_force', 'date_ratified', 'date_future_enter_force_by',
-            'convention_org', 'convention_shortname', 'convention_fullname'
-        ]
-        
-        for col in optional_columns:
-            if col in df.columns:
-                columns_to_keep.append(col)
+        # Process string fields - first matching source column per target
+        for new_name, sources in STRING_FIELD_SOURCES.items():
+            old_name = next((name for name in sources if name in tbl.column_names), None)
+            if old_name is None:
+                continue
+            logger.debug("   📝 Processing string field: %s -> %s", old_name, new_name)
+            # Clean and handle empty strings
+            cleaned = pc.utf8_trim_whitespace(tbl[old_name])
+            empty = pc.is_in(cleaned, value_set=pa.array(['', 'nan', 'NaN']))
+            columns[new_name] = pc.if_else(empty, pa.scalar(None, pa.string()), cleaned)
         
         # Keep only processed columns
-        df = df[columns_to_keep]
+        tbl = pa.table(columns)
         
         # Remove any duplicates
-        original_count = len(df)
-        df = df.drop_duplicates()
-        if len(df) < original_count:
-            print(f"   🔧 Removed {original_count - len(df)} duplicate records")
+        original_count = tbl.num_rows
+        tbl = drop_duplicate_rows(tbl)
+        if tbl.num_rows < original_count:
+            print(f"   🔧 Removed {original_count - tbl.num_rows} duplicate records")
+        report_code_conflicts(tbl, 'ILO C188')
         
         # Save cleaned file
-        df.to_csv("/import/country_iso_ILO_c188_cleaned.csv", index=False)
-        print(f"✅ Cleaned country_iso_ILO_c188.csv: {len(df)} records")
-        print(f"📋 Final columns: {list(df.columns)}")
-        print(f"📋 Sample data: {df.head(2).to_dict('records')}")
-        
-        # Check for any remaining non-date data in date columns
-        for col in ['date_entered_force', 'date_ratified', 'date_future_enter_force_by']:
-            if col in df.columns:
-                non_null_values = df[col].dropna()
-                if len(non_null_values) > 0:
-                    print(f"   📅 {col}: {len(non_null_values)} non-null values, sample: {non_null_values.iloc[0] if len(non_null_values) > 0 else 'None'}")
+        write_table(tbl, ILO_CLEANED, lineterminator='\n')
+        print(f"✅ Cleaned country_iso_ILO_c188.csv: {tbl.num_rows} records")
+        print(f"📋 Final columns: {tbl.column_names}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📋 Sample data: %s", tbl.slice(0, 2).to_pylist())
+            
+            # Check for any remaining non-date data in date columns
+            for col in ['date_entered_force', 'date_ratified', 'date_future_enter_force_by']:
+                if col in tbl.column_names:
+                    non_null_values = tbl[col].drop_null()
+                    if len(non_null_values) > 0:
+                        logger.debug("   📅 %s: %d non-null values, sample: %s", col, len(non_null_values), non_null_values[0])
         
         print("🔄 UUID mapping will be handled during SQL import phase")
-        return df
+        return ILO_CLEANED, tbl.column_names, tbl.num_rows
         
-    except Exception as e:
-        print(f"❌ Error cleaning country_iso_ILO_c188.csv: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Error cleaning country_iso_ILO_c188.csv")
         raise
 
 def show_country_source_mapping_plan():
@@ -176,23 +251,38 @@ def show_country_source_mapping_plan():
     print("   ✅ Foreign key relationships established in SQL import")
     print("=" * 55)
 
-def validate_cleaned_data():
-    """Validate that cleaned files are ready for SQL import"""
+def read_csv_summary(path):
+    """Return (columns, row_count) for a CSV file without loading its rows"""
+    with open(path, 'r', newline='', encoding='utf-8') as fh:
+        reader = csv.reader(fh)
+        columns = next(reader, [])
+        row_count = sum(1 for row in reader if row)
+    return columns, row_count
+
+def validate_cleaned_data(foc_summary=None, ilo_summary=None):
+    """Validate that cleaned files are ready for SQL import
+
+    Takes the (path, columns, row_count) summaries returned by the cleaners;
+    a file is only read back from disk when its summary is not given.
+    """
     print("\n🔍 Validating cleaned data for SQL import...")
     
     validation_passed = True
     
     # Check FOC file
     try:
-        foc_df = pd.read_csv("/import/country_iso_foc_cleaned.csv")
+        if foc_summary is None:
+            foc_columns, foc_count = read_csv_summary(FOC_CLEANED)
+        else:
+            _, foc_columns, foc_count = foc_summary
         required_foc_cols = ['alpha_3_code', 'is_foc']
         
-        missing_foc_cols = set(required_foc_cols) - set(foc_df.columns)
+        missing_foc_cols = set(required_foc_cols) - set(foc_columns)
         if missing_foc_cols:
             print(f"❌ FOC file missing columns: {missing_foc_cols}")
             validation_passed = False
         else:
-            print(f"✅ FOC file structure valid: {len(foc_df)} records, columns: {list(foc_df.columns)}")
+            print(f"✅ FOC file structure valid: {foc_count} records, columns: {foc_columns}")
             
     except Exception as e:
         print(f"❌ Could not validate FOC file: {e}")
@@ -200,15 +290,18 @@ def validate_cleaned_data():
     
     # Check ILO file
     try:
-        ilo_df = pd.read_csv("/import/country_iso_ILO_c188_cleaned.csv")
+        if ilo_summary is None:
+            ilo_columns, ilo_count = read_csv_summary(ILO_CLEANED)
+        else:
+            _, ilo_columns, ilo_count = ilo_summary
         required_ilo_cols = ['alpha_3_code', 'is_c188_ratified']
         
-        missing_ilo_cols = set(required_ilo_cols) - set(ilo_df.columns)
+        missing_ilo_cols = set(required_ilo_cols) - set(ilo_columns)
         if missing_ilo_cols:
             print(f"❌ ILO file missing columns: {missing_ilo_cols}")
             validation_passed = False
         else:
-            print(f"✅ ILO file structure valid: {len(ilo_df)} records, columns: {list(ilo_df.columns)}")
+            print(f"✅ ILO file structure valid: {ilo_count} records, columns: {ilo_columns}")
             
     except Exception as e:
         print(f"❌ Could not validate ILO file: {e}")
@@ -229,11 +322,11 @@ def main():
         
         # Clean individual files
         print("\n🧼 Cleaning country profile files...")
-        clean_country_iso_foc()
-        clean_country_iso_ilo_c188()
+        foc_summary = clean_country_iso_foc()
+        ilo_summary = clean_country_iso_ilo_c188()
         
         # Validate the results
-        if validate_cleaned_data():
+        if validate_cleaned_data(foc_summary, ilo_summary):
             print("\n✅ All ENHANCED country profile data cleaning completed!")
             print("🎯 Ready for UUID-based import with source tracking")
             print("📊 All manual ID generation removed - database will handle UUIDs")
@@ -249,4 +342,5 @@ def main():
         raise
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("EBISU_LOG_LEVEL", "INFO"), format="%(message)s")
     main()
\ No newline at end of file
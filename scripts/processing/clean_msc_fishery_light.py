@@ -14,26 +14,30 @@ OUTPUT = REFERENCE_OUT / "cleaned_msc_fishery.csv"
 def collapse_whitespace(value: str) -> str:
     return " ".join(value.split())
 
+def clean_rows(reader, width: int):
+    for row in reader:
+        if not row:
+            continue  # Blank line
+        if len(row) != width:
+            # Pad short rows and drop cells beyond the header
+            row = (row + [""] * width)[:width]
+        yield [collapse_whitespace(value) for value in row]
+
 def main():
     if not INPUT.exists():
         raise FileNotFoundError(f"Missing raw MSC file: {INPUT}")
 
     with INPUT.open("r", newline="", encoding="utf-8-sig") as infile:
-        reader = csv.DictReader(infile)
-        fieldnames = [name.strip().replace(" ", "_") for name in reader.fieldnames]
+        reader = csv.reader(infile)
+        header = next(reader, [])
+        fieldnames = [name.strip().replace(" ", "_") for name in header]
+        width = len(fieldnames)
 
         OUTPUT.parent.mkdir(parents=True, exist_ok=True)
         with OUTPUT.open("w", newline="", encoding="utf-8") as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for row in reader:
-                cleaned = {}
-                for original_name, cleaned_name in zip(reader.fieldnames, fieldnames):
-                    value = row.get(original_name, "")
-                    value = collapse_whitespace(value.strip()) if isinstance(value, str) else value
-                    cleaned[cleaned_name] = value
-                writer.writerow(cleaned)
+            writer = csv.writer(outfile)
+            writer.writerow(fieldnames)
+            writer.writerows(clean_rows(reader, width))
 
     print(f"✅ Cleaned MSC fishery file written to {OUTPUT}")
 
@@ -8,8 +8,18 @@ cleaned derivatives into EBISU_PROCESSED_ROOT/reference (defaults to raw root).
 import csv
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ModuleNotFoundError:
+    pa = None
+
+from arrow_csv import write_table
 
 RAW_ROOT = Path(os.environ.get("EBISU_RAW_ROOT", "data/raw")).expanduser().resolve()
 PROCESSED_ROOT = Path(os.environ.get("EBISU_PROCESSED_ROOT", RAW_ROOT)).expanduser().resolve()
@@ -17,166 +27,226 @@ REFERENCE_OUT = PROCESSED_ROOT / "reference"
 REFERENCE_OUT.mkdir(parents=True, exist_ok=True)
 
 
-def read_csv(path: Path) -> (List[str], List[Dict[str, str]]):
+@lru_cache(maxsize=4096)
+def normalize_code(value: str, width: int) -> str:
+    """Drop ".0" float suffixes from a numeric code and zero-pad it to width.
+
+    Code columns only hold a few hundred distinct values, so each one is
+    normalized once and served from the cache afterwards.
+    """
+    value = value.replace(".0", "").strip()
+    return value.zfill(width) if value else ""
+
+
+def normalize_code_array(values, width: int):
+    """Vectorized normalize_code over a PyArrow string array"""
+    values = pc.utf8_trim_whitespace(pc.replace_substring(values, ".0", ""))
+    padded = pc.utf8_lpad(values, width=width, padding="0")
+    return pc.if_else(pc.equal(values, ""), values, padded)
+
+
+# PyArrow's start-up cost dominates on small files, so only files of at least
+# 1 MiB are read with it; the rest stay on the csv module.
+ARROW_MIN_BYTES = 1 << 20
+
+
+def use_arrow(path: Path) -> bool:
+    return pa is not None and path.stat().st_size >= ARROW_MIN_BYTES
+
+
+def read_table(path: Path):
+    """Read a large CSV with PyArrow's block-parallel reader.
+
+    Every column is read as text and stripped, matching iter_rows, so codes keep
+    their leading zeros. See ARROW_MIN_BYTES for when this is worth using.
+    """
     with path.open("r", newline="", encoding="utf-8-sig") as fh:
-        reader = csv.DictReader(fh)
-        rows = []
-        for row in reader:
-            cleaned = {k: (v.strip() if v is not None else "") for k, v in row.items()}
-            rows.append(cleaned)
-        return reader.fieldnames, rows
-
-
-def write_csv(path: Path, fieldnames: List[str], rows: List[Dict[str, str]]):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
+        header = next(csv.reader(fh), [])
+    tbl = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=64 << 20, use_threads=True),
+        convert_options=pacsv.ConvertOptions(column_types={name: pa.string() for name in header})
+    )
+    return pa.table({name: pc.utf8_trim_whitespace(tbl[name]) for name in tbl.column_names})
+
+
+def iter_rows(reader: csv.DictReader) -> Iterator[Dict[str, str]]:
+    for row in reader:
+        yield {k: (v.strip() if v is not None else "") for k, v in row.items()}
+
+
+def stream_csv(in_path: Path, out_path: Path,
+               transform: Optional[Callable[[Iterator[Dict[str, str]]], Iterable[Dict[str, str]]]] = None,
+               fieldnames: Optional[List[str]] = None,
+               rename: Optional[Dict[str, str]] = None):
+    """Stream rows from in_path through transform into out_path one row at a time.
+
+    transform takes the iterator of stripped input rows and yields output rows, so
+    it can drop or fan out rows without building a list. rename maps input column
+    names to output names once on the header, so rows arrive already renamed.
+    fieldnames is the output header; it defaults to the (renamed) input header.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with in_path.open("r", newline="", encoding="utf-8-sig") as infile, \
+            out_path.open("w", newline="", encoding="utf-8") as outfile:
+        reader = csv.DictReader(infile)
+        source_fields = reader.fieldnames or []
+        if rename:
+            source_fields = reader.fieldnames = [rename.get(f, f) for f in source_fields]
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames if fieldnames is not None else source_fields)
         writer.writeheader()
-        writer.writerows(rows)
+        rows = iter_rows(reader)
+        writer.writerows(transform(rows) if transform is not None else rows)
 
 
 def clean_country_iso():
-    fields, rows = read_csv(RAW_ROOT / "country_iso.csv")
-    for row in rows:
-        numeric = row.get("numeric_code", "").replace(".0", "").strip()
-        row["numeric_code"] = numeric.zfill(3) if numeric else ""
-    write_csv(REFERENCE_OUT / "country_iso_cleaned.csv", fields, rows)
+    in_path = RAW_ROOT / "country_iso.csv"
+    out_path = REFERENCE_OUT / "country_iso_cleaned.csv"
+
+    if use_arrow(in_path):
+        tbl = read_table(in_path)
+        idx = tbl.column_names.index("numeric_code")
+        write_table(tbl.set_column(idx, "numeric_code", normalize_code_array(tbl["numeric_code"], 3)), out_path)
+        return
+
+    def transform(rows):
+        for row in rows:
+            row["numeric_code"] = normalize_code(row.get("numeric_code", ""), 3)
+            yield row
+    stream_csv(in_path, out_path, transform)
 
 
 def clean_country_iso_foc():
-    fields, rows = read_csv(RAW_ROOT / "country_iso_foc.csv")
-    write_csv(REFERENCE_OUT / "country_iso_foc_cleaned.csv", fields, rows)
+    stream_csv(RAW_ROOT / "country_iso_foc.csv", REFERENCE_OUT / "country_iso_foc_cleaned.csv")
 
 
 def clean_country_iso_ilo():
-    fields, rows = read_csv(RAW_ROOT / "country_iso_ILO_c188.csv")
-    write_csv(REFERENCE_OUT / "country_iso_ILO_c188_cleaned.csv", fields, rows)
+    stream_csv(RAW_ROOT / "country_iso_ILO_c188.csv", REFERENCE_OUT / "country_iso_ILO_c188_cleaned.csv")
 
 def clean_country_iso_eu():
-    fields, rows = read_csv(RAW_ROOT / "country_iso_EU.csv")
-    write_csv(REFERENCE_OUT / "country_iso_EU_cleaned.csv", fields, rows)
+    stream_csv(RAW_ROOT / "country_iso_EU.csv", REFERENCE_OUT / "country_iso_EU_cleaned.csv")
 
 
 def clean_fao_major_areas():
-    fields, rows = read_csv(RAW_ROOT / "fao_major_areas.csv")
-    for row in rows:
-        code = row.get("fao_major_area", "").replace(".0", "").strip()
-        row["fao_major_area"] = code.zfill(2) if code else ""
-    write_csv(REFERENCE_OUT / "fao_major_areas_cleaned.csv", fields, rows)
+    def transform(rows):
+        for row in rows:
+            row["fao_major_area"] = normalize_code(row.get("fao_major_area", ""), 2)
+            yield row
+    stream_csv(RAW_ROOT / "fao_major_areas.csv", REFERENCE_OUT / "fao_major_areas_cleaned.csv", transform)
 
 
 def clean_gear_types_fao():
-    fields, rows = read_csv(RAW_ROOT / "gearTypes_fao.csv")
-    cleaned_rows = []
-    for row in rows:
-        code = row.get("fao_isscfg_code", "").replace(".0", "").strip()
-        name = row.get("fao_isscfg_name", "").strip()
-        row["fao_isscfg_code"] = code.zfill(2) if code else ""
-        row["fao_isscfg_alpha"] = row.get("fao_isscfg_alpha", "").strip()
-        if name:
-            row["fao_isscfg_name"] = name
-            cleaned_rows.append(row)
-    write_csv(REFERENCE_OUT / "gearTypes_fao_cleaned.csv", fields, cleaned_rows)
+    def transform(rows):
+        for row in rows:
+            name = row.get("fao_isscfg_name", "").strip()
+            row["fao_isscfg_code"] = normalize_code(row.get("fao_isscfg_code", ""), 2)
+            row["fao_isscfg_alpha"] = row.get("fao_isscfg_alpha", "").strip()
+            if name:
+                row["fao_isscfg_name"] = name
+                yield row
+    stream_csv(RAW_ROOT / "gearTypes_fao.csv", REFERENCE_OUT / "gearTypes_fao_cleaned.csv", transform)
 
 
 def clean_gear_types_cbp():
-    fields, rows = read_csv(RAW_ROOT / "gearTypes_cbp.csv")
-    write_csv(REFERENCE_OUT / "gearTypes_cbp_cleaned.csv", fields, rows)
+    stream_csv(RAW_ROOT / "gearTypes_cbp.csv", REFERENCE_OUT / "gearTypes_cbp_cleaned.csv")
 
 
 def clean_gear_types_msc():
-    fields, rows = read_csv(RAW_ROOT / "gearTypes_msc.csv")
-    write_csv(REFERENCE_OUT / "cleaned_gear_types_msc.csv", fields, rows)
+    stream_csv(RAW_ROOT / "gearTypes_msc.csv", REFERENCE_OUT / "cleaned_gear_types_msc.csv")
 
 
 def clean_gear_relationship():
-    _, rows = read_csv(RAW_ROOT / "gearTypes_fao_cbp_relationship.csv")
-    relationships = []
-    for row in rows:
-        fao_code = row.get("fao_isscfg_code", "").replace(".0", "").strip()
-        cbp_codes = row.get("cbp_gear_code", "")
-        codes = [code.strip() for code in cbp_codes.split(';') if code.strip()]
-        for code in codes:
-            relationships.append({
-                "fao_isscfg_code": fao_code.zfill(2) if fao_code else "",
-                "cbp_gear_code": code
-            })
-    write_csv(REFERENCE_OUT / "gearTypes_relationship_fao_cbp_cleaned.csv",
-              ["fao_isscfg_code", "cbp_gear_code"],
-              relationships)
+    in_path = RAW_ROOT / "gearTypes_fao_cbp_relationship.csv"
+    out_path = REFERENCE_OUT / "gearTypes_relationship_fao_cbp_cleaned.csv"
+
+    if use_arrow(in_path):
+        # Explode the ';'-separated CBP codes as whole columns instead of per row
+        tbl = read_table(in_path)
+        codes = pc.split_pattern(tbl["cbp_gear_code"].combine_chunks(), ";")
+        cbp_codes = pc.utf8_trim_whitespace(pc.list_flatten(codes))
+        fao_codes = pc.take(normalize_code_array(tbl["fao_isscfg_code"].combine_chunks(), 2),
+                            pc.list_parent_indices(codes))
+        exploded = pa.table({"fao_isscfg_code": fao_codes, "cbp_gear_code": cbp_codes})
+        write_table(exploded.filter(pc.not_equal(cbp_codes, "")), out_path)
+        return
+
+    def transform(rows):
+        for row in rows:
+            fao_code = normalize_code(row.get("fao_isscfg_code", ""), 2)
+            # Rows go straight to the writer, so no intermediate list is built
+            for code in row.get("cbp_gear_code", "").split(';'):
+                code = code.strip()
+                if code:
+                    yield {
+                        "fao_isscfg_code": fao_code,
+                        "cbp_gear_code": code
+                    }
+    stream_csv(in_path, out_path, transform, ["fao_isscfg_code", "cbp_gear_code"])
 
 
 def clean_msc_relationship():
-    fields, rows = read_csv(RAW_ROOT / "gearTypes_msc_fao_relationship.csv")
-    write_csv(REFERENCE_OUT / "cleaned_gear_types_fao_msc_relationship.csv", fields, rows)
+    stream_csv(RAW_ROOT / "gearTypes_msc_fao_relationship.csv",
+               REFERENCE_OUT / "cleaned_gear_types_fao_msc_relationship.csv")
 
 
 def clean_vessel_hull_material():
-    fields, rows = read_csv(RAW_ROOT / "vessel_hullMaterial.csv")
-    new_fields = ["hull_material" if f == "hullMaterial" else f for f in fields]
-    cleaned = []
-    for row in rows:
-        entry = {}
-        for field, value in row.items():
-            key = "hull_material" if field == "hullMaterial" else field
-            entry[key] = value
-        cleaned.append(entry)
-    write_csv(REFERENCE_OUT / "vessel_hullMaterial_cleaned.csv", new_fields, cleaned)
+    stream_csv(RAW_ROOT / "vessel_hullMaterial.csv", REFERENCE_OUT / "vessel_hullMaterial_cleaned.csv",
+               rename={"hullMaterial": "hull_material"})
 
 
 def clean_vessel_types():
-    fields, rows = read_csv(RAW_ROOT / "vesselTypes.csv")
     mapping = {
         'vesselType_cat': 'vessel_type_cat',
         'vesselType_subcat': 'vessel_type_subcat',
         'vesselType_isscfv_code': 'vessel_type_isscfv_code',
         'vesselType_isscfv_alpha': 'vessel_type_isscfv_alpha'
     }
-    new_fields = [mapping.get(f, f) for f in fields]
-    cleaned = []
-    for row in rows:
-        entry = {}
-        for field, value in row.items():
-            key = mapping.get(field, field)
-            if key == 'vessel_type_isscfv_code':
-                val = value.replace('.0', '').strip()
-                entry[key] = val.zfill(2) if val else ''
-            else:
-                entry[key] = value
-        cleaned.append(entry)
-    write_csv(REFERENCE_OUT / "vesselTypes_cleaned.csv", new_fields, cleaned)
+
+    def transform(rows):
+        for row in rows:
+            if 'vessel_type_isscfv_code' in row:
+                row['vessel_type_isscfv_code'] = normalize_code(row['vessel_type_isscfv_code'], 2)
+            yield row
+    stream_csv(RAW_ROOT / "vesselTypes.csv", REFERENCE_OUT / "vesselTypes_cleaned.csv",
+               transform, rename=mapping)
 
 
 def clean_rfmos():
-    fields, rows = read_csv(RAW_ROOT / "rfmos.csv")
-    write_csv(REFERENCE_OUT / "rfmos_cleaned.csv", fields, rows)
+    stream_csv(RAW_ROOT / "rfmos.csv", REFERENCE_OUT / "rfmos_cleaned.csv")
 
 
 def clean_original_sources():
-    fields, rows = read_csv(RAW_ROOT / "original_sources.csv")
-    cleaned = []
-    for row in rows:
-        row['source_type'] = row.get('source_type', '').replace(';', '; ').strip()
-        cleaned.append(row)
-    write_csv(REFERENCE_OUT / "cleaned_original_sources.csv", fields, cleaned)
+    def transform(rows):
+        for row in rows:
+            row['source_type'] = row.get('source_type', '').replace(';', '; ').strip()
+            yield row
+    stream_csv(RAW_ROOT / "original_sources.csv", REFERENCE_OUT / "cleaned_original_sources.csv", transform)
+
+
+CLEANERS = [
+    clean_country_iso,
+    clean_country_iso_foc,
+    clean_country_iso_ilo,
+    clean_country_iso_eu,
+    clean_fao_major_areas,
+    clean_gear_types_fao,
+    clean_gear_types_cbp,
+    clean_gear_types_msc,
+    clean_gear_relationship,
+    clean_msc_relationship,
+    clean_vessel_hull_material,
+    clean_vessel_types,
+    clean_rfmos,
+    clean_original_sources,
+]
 
 
 def main():
     print("🚀 Cleaning reference datasets (lightweight mode)...")
-    clean_country_iso()
-    clean_country_iso_foc()
-    clean_country_iso_ilo()
-    clean_country_iso_eu()
-    clean_fao_major_areas()
-    clean_gear_types_fao()
-    clean_gear_types_cbp()
-    clean_gear_types_msc()
-    clean_gear_relationship()
-    clean_msc_relationship()
-    clean_vessel_hull_material()
-    clean_vessel_types()
-    clean_rfmos()
-    clean_original_sources()
+    # These files are a few hundred rows each, so starting a process pool costs
+    # more than it saves
+    for cleaner in CLEANERS:
+        cleaner()
     print(f"✅ Outputs written to {REFERENCE_OUT}")
 
 
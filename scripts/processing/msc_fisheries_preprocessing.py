@@ -4,11 +4,20 @@ Fixed MSC fishery preprocessing - removes source_id handling and normalizes enum
 SQL script will handle source_id lookup directly
 """
 
+import csv
+import numpy as np
 import pandas as pd
 import re
 import sys
 from typing import List
 
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None
+
+from arrow_csv import write_table
+
 # EXACT column mapping for your CSV structure
 COLUMN_MAPPING = {
     'Fishery Name': 'msc_fishery_name',
@@ -41,9 +50,28 @@ MSC_FISHERY_STATUS_UOC_MAPPING = {
     'withdrawn': 'WITHDRAWN'
 }
 
+# Patterns used by the per-value cleaners, compiled once
+_SCI_PAREN = re.compile(r'\(([^)]+)\)$')
+_NESTED = re.compile(r'^([A-Z][a-z]+)\s*\(([A-Z][a-z]+)\)\s*(.+)$')
+_PARENS_STRIP = re.compile(r'\s*\([^)]+\)\s*')
+_PARENS_CONTENT = re.compile(r'\(([^)]+)\)')
+_WS = re.compile(r'\s+')
+_SCI_START = re.compile(r'^[A-Z][a-z]+')
+_FAO_NUM = re.compile(r'\b\d{1,2}\b')
+_CODE_VALID = re.compile(r'^[A-Z0-9\-]+')
+
+# Second words marking an unspecified species ("Gadus spp")
+_SP_TOKENS = frozenset({'spp', 'sp', 'spp.', 'sp.'})
+
+# Delimiters between multiple species / certificate code groups. Certificate
+# groups are not split on commas here, since commas also separate codes inside
+# parentheses and are handled per group.
+_SEP_SCI = re.compile(r';|\||,| and | & ')
+_SEP_CERT = re.compile(r';|\|| and | & ')
+
 def normalize_enum_value(value: str, mapping: dict) -> str:
     """Normalize enum values to match PostgreSQL enum definitions"""
-    if not value or pd.isna(value):
+    if not value:
         return None
     
     # Convert to lowercase for comparison
@@ -63,42 +91,33 @@ def normalize_enum_value(value: str, mapping: dict) -> str:
 
 def clean_scientific_names(species_text: str) -> List[str]:
     """Clean and extract scientific names from MSC species text"""
-    if not species_text or pd.isna(species_text):
+    if not species_text:
         return []
     
     cleaned_names = []
     species_text = str(species_text).strip()
     
     # Handle multiple species separated by various delimiters
-    separators = [';', '|', ',', ' and ', ' & ']
-    species_list = [species_text]
-    
-    for sep in separators:
-        temp_list = []
-        for item in species_list:
-            temp_list.extend(item.split(sep))
-        species_list = temp_list
-    
-    for species in species_list:
+    for species in _SEP_SCI.split(species_text):
         species = species.strip()
         if not species:
             continue
             
         # Remove common prefixes like "Longfin squid" before scientific name
-        scientific_part_match = re.search(r'\(([^)]+)\)$', species)
+        scientific_part_match = _SCI_PAREN.search(species)
         if scientific_part_match:
             species = scientific_part_match.group(1)
         
         # Handle complex nested parentheses like "Penaeus (Melicertus) latisulcatus"
         if '(' in species and ')' in species:
-            nested_match = re.match(r'^([A-Z][a-z]+)\s*\(([A-Z][a-z]+)\)\s*(.+)$', species)
+            nested_match = _NESTED.match(species)
             if nested_match:
                 genus1 = nested_match.group(1)
                 genus2 = nested_match.group(2) 
                 species_part = nested_match.group(3).strip()
                 cleaned_names.extend([f"{genus1} {species_part}", f"{genus2} {species_part}"])
             else:
-                cleaned_name = re.sub(r'\s*\([^)]+\)\s*', ' ', species)
+                cleaned_name = _PARENS_STRIP.sub(' ', species)
                 cleaned_names.append(cleaned_name.strip())
         else:
             cleaned_names.append(species)
@@ -114,59 +133,53 @@ def clean_scientific_names(species_text: str) -> List[str]:
             continue
             
         # Remove "spp" or "sp" if it's the second word
-        if len(words) >= 2 and words[1].lower() in ['spp', 'sp', 'spp.', 'sp.']:
+        if len(words) >= 2 and words[1].lower() in _SP_TOKENS:
             cleaned_name = words[0]
         else:
             cleaned_name = ' '.join(words)
         
-        cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip()
+        cleaned_name = _WS.sub(' ', cleaned_name).strip()
         
         # Only keep names that look like valid scientific names
-        if cleaned_name and re.match(r'^[A-Z][a-z]+', cleaned_name):
+        if cleaned_name and _SCI_START.match(cleaned_name):
             final_names.append(cleaned_name)
     
-    return list(set(final_names))
+    # Dedupe keeping first-seen order so output is stable between runs
+    return list(dict.fromkeys(final_names))
 
-def clean_fao_areas(fao_text: str) -> List[str]:
-    """Clean and normalize FAO area codes from Ocean Area field"""
-    if not fao_text or pd.isna(fao_text):
-        return []
-    
-    # Handle various separators and extract numeric FAO codes
-    fao_text = str(fao_text)
-    
-    # Extract FAO area numbers using regex
-    fao_numbers = re.findall(r'\b\d{1,2}\b', fao_text)
+# Fallback FAO major areas for ocean names given without area numbers; first match wins
+FAO_AREA_NAME_CODES = {
+    'atlantic': '21|27|31|34|37|41|47',
+    'pacific': '61|67|71|77|81|87',
+    'indian': '51|57',
+    'mediterranean': '37',
+    'north sea': '27',
+    'baltic': '27'
+}
+
+def clean_fao_areas(fao_text: pd.Series) -> pd.Series:
+    """Clean and normalize FAO area codes for a whole Ocean Area column
+
+    Returns the zero-padded, '|'-joined unique codes per row; rows without any
+    codes are left out.
+    """
+    fao_text = fao_text.dropna().astype(str)
     
-    cleaned_areas = []
-    for area in fao_numbers:
-        # Zero-pad single digits
-        if len(area) == 1:
-            area = f"0{area}"
-        cleaned_areas.append(area)
+    # Extract FAO area numbers using regex and zero-pad single digits
+    areas = fao_text.str.findall(_FAO_NUM).map(
+        lambda numbers: '|'.join(dict.fromkeys(area.zfill(2) for area in numbers)))
     
     # If no numbers found, try to extract from common area names
-    if not cleaned_areas:
-        area_mappings = {
-            'atlantic': ['21', '27', '31', '34', '37', '41', '47'],
-            'pacific': ['61', '67', '71', '77', '81', '87'],
-            'indian': ['51', '57'],
-            'mediterranean': ['37'],
-            'north sea': ['27'],
-            'baltic': ['27']
-        }
-        
-        fao_lower = fao_text.lower()
-        for area_name, codes in area_mappings.items():
-            if area_name in fao_lower:
-                cleaned_areas.extend(codes)
-                break
+    fao_lower = fao_text.str.lower()
+    matches = [fao_lower.str.contains(name, regex=False).to_numpy(dtype=bool) for name in FAO_AREA_NAME_CODES]
+    fallback = np.select(matches, list(FAO_AREA_NAME_CODES.values()), default='')
+    areas = areas.where(areas != '', fallback)
     
-    return list(set(cleaned_areas))
+    return areas[areas != '']
 
 def clean_cert_codes(cert_text: str) -> List[str]:
     """Clean and normalize MSC certification codes - extract all codes from parentheses and commas"""
-    if not cert_text or pd.isna(cert_text):
+    if not cert_text:
         return []
     
     cert_text = str(cert_text).strip()
@@ -176,17 +189,8 @@ def clean_cert_codes(cert_text: str) -> List[str]:
     all_codes = []
     
     # First, split by common separators like semicolons, pipes, 'and', '&'
-    separators = [';', '|', ' and ', ' & ']
-    code_groups = [cert_text]
-    
-    for sep in separators:
-        temp_groups = []
-        for group in code_groups:
-            temp_groups.extend(group.split(sep))
-        code_groups = temp_groups
-    
     # Now process each group to extract codes from parentheses and clean them
-    for group in code_groups:
+    for group in _SEP_CERT.split(cert_text):
         group = group.strip()
         if not group:
             continue
@@ -195,18 +199,17 @@ def clean_cert_codes(cert_text: str) -> List[str]:
         # Examples: "MSC-F-31213 (MRAG-F-0022)" -> ["MSC-F-31213", "MRAG-F-0022"]
         
         # Find all text in parentheses
-        import re
-        parentheses_matches = re.findall(r'\(([^)]+)\)', group)
+        parentheses_matches = _PARENS_CONTENT.findall(group)
         
         # Get text outside parentheses (remove everything in parentheses)
-        outside_parens = re.sub(r'\s*\([^)]+\)\s*', '', group).strip()
+        outside_parens = _PARENS_STRIP.sub('', group).strip()
         
         # Add the main code (outside parentheses) if it exists
         if outside_parens:
             # Split by commas in case there are multiple codes outside parens
             for code in outside_parens.split(','):
                 code = code.strip()
-                if code and re.match(r'^[A-Z0-9\-]+', code):  # Basic validation
+                if code and _CODE_VALID.match(code):  # Basic validation
                     all_codes.append(code)
         
         # Add codes found inside parentheses
@@ -214,130 +217,101 @@ def clean_cert_codes(cert_text: str) -> List[str]:
             # Split by commas in case there are multiple codes in one parenthesis
             for code in paren_content.split(','):
                 code = code.strip()
-                if code and re.match(r'^[A-Z0-9\-]+', code):  # Basic validation
+                if code and _CODE_VALID.match(code):  # Basic validation
                     all_codes.append(code)
     
     # Remove duplicates while preserving order
-    seen = set()
-    unique_codes = []
-    for code in all_codes:
-        if code not in seen:
-            seen.add(code)
-            unique_codes.append(code)
-    
-    return unique_codes
+    return list(dict.fromkeys(all_codes))
 
-def truncate_long_text(text: str, max_length: int = 500) -> str:
-    """Truncate very long fishery names to fit database constraints"""
-    if not text or pd.isna(text):
-        return ""
-    
-    text = str(text).strip()
-    if len(text) <= max_length:
+def truncate_long_text(text: pd.Series, max_length: int = 500) -> pd.Series:
+    """Truncate very long fishery names to fit database constraints
+
+    Takes a column of non-null strings; only the over-long values are touched.
+    """
+    text = text.str.strip()
+    too_long = text.str.len() > max_length
+    if not too_long.any():
         return text
     
     # Truncate at word boundary
-    truncated = text[:max_length-3]
-    last_space = truncated.rfind(' ')
+    truncated = text[too_long].str.slice(0, max_length - 3)
+    last_space = truncated.str.rfind(' ')
+    at_word = truncated.str.replace(r' [^ ]*$', '', regex=True)
     
-    if last_space > max_length * 0.8:
-        return truncated[:last_space] + "..."
-    else:
-        return truncated + "..."
+    text = text.copy()
+    text[too_long] = at_word.where(last_space > max_length * 0.8, truncated) + "..."
+    return text
 
 def process_msc_fishery_data(input_file: str, output_file: str):
     """Process MSC fishery data with exact column mapping and enum normalization"""
     print(f"Processing MSC fishery data: {input_file}")
     
-    # Read the data
-    df = pd.read_csv(input_file, encoding='utf-8')
-    print(f"Loaded {len(df)} records")
+    # Verify expected columns exist from the header alone; utf-8-sig drops the
+    # BOM some MSC exports start with, which would otherwise prefix 'Fishery Name'
+    with open(input_file, 'r', newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
     
-    # Verify expected columns exist
     missing_columns = []
     for original_col in COLUMN_MAPPING.keys():
-        if original_col not in df.columns:
+        if original_col not in header:
             missing_columns.append(original_col)
     
     if missing_columns:
         print(f"ERROR: Missing expected columns: {missing_columns}")
-        print(f"Available columns: {list(df.columns)}")
+        print(f"Available columns: {header}")
         sys.exit(1)
     
+    # Read only the mapped columns, as Arrow-backed strings when PyArrow is available
+    read_options = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'} if pa is not None else {}
+    df = pd.read_csv(input_file, encoding='utf-8-sig', usecols=list(COLUMN_MAPPING), **read_options)
+    print(f"Loaded {len(df)} records")
+    
     print("Column mapping:")
     for orig, new in COLUMN_MAPPING.items():
         print(f"  '{orig}' -> '{new}'")
     
-    processed_rows = []
-    long_names = 0
-    enum_normalizations = 0
+    # Work on whole columns rather than row by row
+    df = df.rename(columns=COLUMN_MAPPING)
+    output_df = pd.DataFrame(index=df.index)
     
-    for idx, row in df.iterrows():
-        new_row = {}
-        
-        # Process each column with the exact mapping
-        
-        # Fishery Name (handle very long names)
-        fishery_name = row['Fishery Name']
-        if pd.notna(fishery_name):
-            original_length = len(str(fishery_name))
-            fishery_name = truncate_long_text(str(fishery_name), 500)
-            if original_length > 500:
-                long_names += 1
-            new_row['msc_fishery_name'] = fishery_name
-        
-        # MSC Status (normalize enum values)
-        status = row['MSC Status']
-        if pd.notna(status):
-            original_status = str(status).strip()
-            normalized_status = normalize_enum_value(original_status, MSC_FISHERY_STATUS_MAPPING)
-            if normalized_status != original_status.upper():
-                enum_normalizations += 1
-            new_row['msc_fishery_status'] = normalized_status
-        
-        # Status (Unit of Certification) (normalize enum values)
-        uoc_status = row['Status (Unit of Certification)']
-        if pd.notna(uoc_status):
-            original_uoc = str(uoc_status).strip()
-            normalized_uoc = normalize_enum_value(original_uoc, MSC_FISHERY_STATUS_UOC_MAPPING)
-            if normalized_uoc != original_uoc.upper():
-                enum_normalizations += 1
-            new_row['msc_fishery_status_uoc'] = normalized_uoc
-        
-        # Species
-        species = row['Species']
-        if pd.notna(species):
-            cleaned_names = clean_scientific_names(str(species))
-            if cleaned_names:
-                new_row['scientific_names'] = '|'.join(cleaned_names)
-        
-        # Gear Type
-        gear = row['Gear Type']
-        if pd.notna(gear):
-            new_row['msc_gear'] = str(gear).strip()
-        
-        # Ocean Area -> FAO Areas
-        ocean_area = row['Ocean Area']
-        if pd.notna(ocean_area):
-            cleaned_areas = clean_fao_areas(str(ocean_area))
-            if cleaned_areas:
-                new_row['fao_areas'] = '|'.join(cleaned_areas)
-        
-        # Certificate Code
-        cert_code = row['Certificate Code']
-        if pd.notna(cert_code):
-            cleaned_codes = clean_cert_codes(str(cert_code))
-            if cleaned_codes:
-                new_row['msc_fishery_cert_codes'] = '|'.join(cleaned_codes)
-        
-        # Add timestamps (REMOVED source_id - SQL will handle it)
-        new_row['created_at'] = pd.Timestamp.now()
-        new_row['updated_at'] = pd.Timestamp.now()
-        
-        processed_rows.append(new_row)
+    # Fishery Name (handle very long names)
+    names = df['msc_fishery_name'].dropna().astype(str)
+    long_names = int((names.str.len() > 500).sum())
+    output_df['msc_fishery_name'] = truncate_long_text(names)
     
-    # Create output dataframe
-    output_df = pd.DataFrame(processed_rows)
+    # MSC Status and Status (Unit of Certification) (normalize enum values)
+    # Exact matches are mapped in one pass; only the distinct values left over
+    # go through normalize_enum_value's partial matching
+    enum_normalizations = 0
+    for column, mapping in (('msc_fishery_status', MSC_FISHERY_STATUS_MAPPING),
+                            ('msc_fishery_status_uoc', MSC_FISHERY_STATUS_UOC_MAPPING)):
+        original = df[column].dropna().astype(str).str.strip()
+        normalized = original.str.lower().map(mapping)
+        unmatched = normalized.isna()
+        if unmatched.any():
+            leftover = original[unmatched]
+            normalized[unmatched] = leftover.map({value: normalize_enum_value(value, mapping) for value in leftover.unique()})
+        enum_normalizations += int((normalized != original.str.upper()).sum())
+        output_df[column] = normalized
+    
+    # Species
+    species = df['scientific_names'].dropna().astype(str).map(clean_scientific_names).map('|'.join)
+    output_df['scientific_names'] = species[species != '']
+    
+    # Gear Type
+    output_df['msc_gear'] = df['msc_gear'].dropna().astype(str).str.strip()
+    
+    # Ocean Area -> FAO Areas
+    output_df['fao_areas'] = clean_fao_areas(df['fao_areas'])
+    
+    # Certificate Code
+    codes = df['msc_fishery_cert_codes'].dropna().astype(str).map(clean_cert_codes).map('|'.join)
+    output_df['msc_fishery_cert_codes'] = codes[codes != '']
+    
+    # Add timestamps (REMOVED source_id - SQL will handle it)
+    now = pd.Timestamp.now()
+    output_df['created_at'] = now
+    output_df['updated_at'] = now
     
     # Remove rows with no fishery name
     initial_count = len(output_df)
@@ -353,16 +327,21 @@ def process_msc_fishery_data(input_file: str, output_file: str):
     if enum_normalizations > 0:
         print(f"Normalized {enum_normalizations} enum values to uppercase")
     
-    # Save processed data
-    output_df.to_csv(output_file, index=False)
+    # Save processed data through Arrow when available, in to_csv's format
+    if pa is not None:
+        write_table(pa.Table.from_pandas(output_df, preserve_index=False), output_file, lineterminator='\n')
+    else:
+        # 50k-row chunks (to_csv gzips a .gz output_file by extension)
+        output_df.to_csv(output_file, index=False, chunksize=50_000)
     
     # Print processing statistics
     print(f"\nProcessing Results:")
     print(f"  Total records processed: {len(output_df)}")
-    print(f"  Records with species: {len(output_df[output_df['scientific_names'].notna()])}")
-    print(f"  Records with FAO areas: {len(output_df[output_df['fao_areas'].notna()])}")
-    print(f"  Records with gear types: {len(output_df[output_df['msc_gear'].notna()])}")
-    print(f"  Records with cert codes: {len(output_df[output_df['msc_fishery_cert_codes'].notna()])}")
+    counts = output_df[['scientific_names', 'fao_areas', 'msc_gear', 'msc_fishery_cert_codes']].notna().sum()
+    print(f"  Records with species: {counts['scientific_names']}")
+    print(f"  Records with FAO areas: {counts['fao_areas']}")
+    print(f"  Records with gear types: {counts['msc_gear']}")
+    print(f"  Records with cert codes: {counts['msc_fishery_cert_codes']}")
     
     # Show sample enum values for debugging
     status_samples = output_df['msc_fishery_status'].dropna().unique()[:5]
@@ -8,24 +8,66 @@ import csv
 import json
 import os
 import re
+import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+except ModuleNotFoundError:
+    DocumentConverter = None  # Fall back to the doc-extract / doc-query CLI
 
 RAW_ROOT = Path(os.environ.get("EBISU_RAW_ROOT", "data/raw")).expanduser().resolve()
 PROCESSED_ROOT = Path(os.environ.get("EBISU_PROCESSED_ROOT", RAW_ROOT)).expanduser().resolve()
 
-def extract_with_docling(pdf_path: Path, output_dir: Path) -> Dict[str, Path]:
-    """Extract PDF content using docling-granite with multiple formats"""
-    print(f"🔍 Extracting {pdf_path.name} using docling-granite...")
+# Seconds docling may spend converting one PDF, as with the doc-extract CLI timeout
+DOCLING_TIMEOUT = 120
+
+# Every worker (and every doc-extract call) loads its own copy of docling's
+# models, so only a few PDFs are converted at a time
+DOCLING_WORKERS = int(os.environ.get("EBISU_DOCLING_WORKERS", "2"))
 
-    # Create temporary output directory
-    temp_dir = output_dir / "temp_docling"
-    temp_dir.mkdir(exist_ok=True)
+@lru_cache(maxsize=1)
+def get_converter():
+    """One DocumentConverter per worker process, so docling's models load once rather than per PDF"""
+    pipeline_options = PdfPipelineOptions(document_timeout=DOCLING_TIMEOUT)
+    return DocumentConverter(format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)})
+
+@lru_cache(maxsize=1)
+def convert_pdf(pdf_path: Path):
+    """Convert a PDF in-process; the last document is kept so the table pass can reuse it"""
+    return get_converter().convert(pdf_path).document
+
+def extract_with_docling(pdf_path: Path, output_dir: Path) -> Dict[str, Any]:
+    """Extract PDF content using docling-granite with multiple formats
+
+    Returns the parsed JSON export under 'json' and the Markdown text under 'md'.
+    """
+    print(f"🔍 Extracting {pdf_path.name} using docling-granite...")
 
     try:
+        if DocumentConverter is not None:
+            # Export JSON and Markdown from the in-process conversion
+            document = convert_pdf(pdf_path)
+            print(f"   ✅ docling extraction successful")
+            return {'json': document.export_to_dict(), 'md': document.export_to_markdown()}
+
+        # Create temporary output directory
+        temp_dir = output_dir / "temp_docling"
+        temp_dir.mkdir(exist_ok=True)
+
         # Extract with JSON and Markdown formats for structured data
         cmd = ["doc-extract", str(pdf_path), "--json"]
         result = subprocess.run(cmd, cwd=temp_dir, capture_output=True, text=True, timeout=120)
@@ -40,16 +82,21 @@ def extract_with_docling(pdf_path: Path, output_dir: Path) -> Dict[str, Path]:
         extracted_dir = Path.home() / "Documents" / "extracted"
         base_name = pdf_path.stem
 
-        files = {}
+        extracted = {}
         for suffix in [".json", ".md"]:
             potential_file = extracted_dir / f"{base_name}{suffix}"
             if potential_file.exists():
                 # Move to our temp directory
                 target = temp_dir / f"{base_name}{suffix}"
                 potential_file.rename(target)
-                files[suffix[1:]] = target
+                if suffix == ".md":
+                    extracted['md'] = target.read_text(encoding='utf-8')
+                else:
+                    data = load_json(target)
+                    if data is not None:
+                        extracted['json'] = data
 
-        return files
+        return extracted
 
     except subprocess.TimeoutExpired:
         print(f"   ⏱️ docling extraction timed out for {pdf_path.name}")
@@ -63,12 +110,17 @@ def extract_tables_with_docling(pdf_path: Path) -> Optional[str]:
     print(f"🔍 Extracting tables from {pdf_path.name}...")
 
     try:
-        cmd = ["doc-query", str(pdf_path), "tables"]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        if DocumentConverter is not None:
+            document = convert_pdf(pdf_path)
+            table_text = "\n\n".join(table.export_to_markdown(doc=document) for table in document.tables)
+        else:
+            cmd = ["doc-query", str(pdf_path), "tables"]
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            table_text = result.stdout if result.returncode == 0 else ""
 
-        if result.returncode == 0 and result.stdout.strip():
+        if table_text.strip():
             print(f"   ✅ Tables extracted successfully")
-            return result.stdout
+            return table_text
         else:
             print(f"   ⚠️ No tables found or extraction failed")
             return None
@@ -77,12 +129,20 @@ def extract_tables_with_docling(pdf_path: Path) -> Optional[str]:
         print(f"   ❌ Table extraction error: {e}")
         return None
 
-def parse_vessel_data_from_json(json_path: Path, pdf_source: str) -> List[Dict[str, str]]:
-    """Parse vessel data from docling JSON output"""
+def load_json(json_path: Path) -> Optional[Any]:
+    """Load a JSON file written by the doc-extract CLI, or None if it cannot be parsed"""
     try:
+        if orjson is not None:
+            return orjson.loads(json_path.read_bytes())
         with json_path.open('r', encoding='utf-8') as f:
-            data = json.load(f)
+            return json.load(f)
+    except Exception as e:
+        print(f"   ❌ JSON parsing error: {e}")
+        return None
 
+def parse_vessel_data_from_json(data: Any, pdf_source: str) -> List[Dict[str, str]]:
+    """Parse vessel data from docling JSON output"""
+    try:
         vessels = []
 
         # Docling JSON structure varies, try to find tabular data
@@ -101,20 +161,14 @@ def parse_vessel_data_from_json(json_path: Path, pdf_source: str) -> List[Dict[s
         print(f"   ❌ JSON parsing error: {e}")
         return []
 
-def parse_vessel_data_from_markdown(md_path: Path, pdf_source: str) -> List[Dict[str, str]]:
+def parse_vessel_data_from_markdown(content: str, pdf_source: str) -> List[Dict[str, str]]:
     """Parse vessel data from docling Markdown output"""
     try:
-        with md_path.open('r', encoding='utf-8') as f:
-            content = f.read()
-
         vessels = []
 
         # Look for markdown tables
-        table_pattern = r'\|.*\|.*\n\|[-\s\|]*\n((?:\|.*\|.*\n)*)'
-        tables = re.findall(table_pattern, content)
-
-        for table_content in tables:
-            vessels.extend(parse_markdown_table(table_content, pdf_source))
+        for headers, rows in iter_markdown_tables(content.splitlines()):
+            vessels.extend(parse_markdown_table(headers, rows, pdf_source))
 
         # If no tables found, try to extract from text
         if not vessels:
@@ -162,100 +216,154 @@ def parse_content_for_vessels(content: Any, pdf_source: str) -> List[Dict[str, s
 
     return vessels
 
-def parse_markdown_table(table_content: str, pdf_source: str) -> List[Dict[str, str]]:
-    """Parse markdown table format"""
-    vessels = []
-
-    lines = table_content.strip().split('\n')
-    if not lines:
-        return vessels
+def split_markdown_row(line: str) -> List[str]:
+    """Split a '| a | b |' markdown table row into its stripped cells"""
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+def is_markdown_separator(line: str) -> bool:
+    """True for a '|---|:--:|' style line that separates a table header from its rows"""
+    line = line.strip()
+    return line.startswith('|') and '-' in line and not line.strip('|-: ')
+
+def iter_markdown_tables(lines: List[str]):
+    """Yield (headers, rows) for each markdown table in a single pass over the lines
+
+    A table is a '|' line followed by a separator line; its rows are the '|'
+    lines that follow until the first line that is not part of the table, or
+    until the next header/separator pair.
+    """
+    header_line = None
+    headers = None
+    rows = []
+
+    for line in lines:
+        in_row = line.lstrip().startswith('|')
+        if headers is not None:
+            if in_row and is_markdown_separator(line) and rows:
+                # A new table starts right after this one; its header was read as a row
+                next_headers = rows.pop()
+                yield headers, rows
+                headers, rows = next_headers, []
+                continue
+            if in_row:
+                rows.append(split_markdown_row(line))
+                continue
+            yield headers, rows
+            headers, rows = None, []
+        if header_line is not None and is_markdown_separator(line):
+            headers = split_markdown_row(header_line)
+            header_line = None
+        else:
+            header_line = line if in_row else None
 
-    # First line might be headers
-    header_line = lines[0] if lines else ""
-    headers = [h.strip() for h in header_line.split('|') if h.strip()]
+    if headers is not None:
+        yield headers, rows
 
-    for line in lines[1:]:  # Skip potential separator line
-        if '|' in line:
-            values = [v.strip() for v in line.split('|') if v.strip()]
+def parse_markdown_table(headers: List[str], rows: List[List[str]], pdf_source: str) -> List[Dict[str, str]]:
+    """Parse markdown table format"""
+    vessels = []
+    headers = [h.lower().replace(' ', '_') for h in headers]
 
-            if len(values) >= len(headers) * 0.5:  # At least half the headers filled
-                vessel = {'pdf_source': pdf_source}
-                for i, value in enumerate(values):
-                    if i < len(headers):
-                        header = headers[i].lower().replace(' ', '_')
-                        vessel[header] = value
+    for values in rows:
+        if sum(1 for v in values if v) >= len(headers) * 0.5:  # At least half the headers filled
+            vessel = {'pdf_source': pdf_source}
+            for header, value in zip(headers, values):
+                if header:
+                    vessel[header] = value
 
-                if any(vessel.get(field, '') for field in ['name', 'vessel_name', 'ship_name']):
-                    vessels.append(vessel)
+            if any(vessel.get(field, '') for field in ['name', 'vessel_name', 'ship_name']):
+                vessels.append(vessel)
 
     return vessels
 
+# Common vessel data patterns, combined so the text is scanned once; the named
+# group that matched says which field was found. Each alternative sits in a
+# lookahead so a match for one field does not hide an overlapping match for another.
+VESSEL_TEXT_PATTERN = re.compile(
+    r'(?=(?:vessel|ship|boat)\s+name[:\s]+(?P<vessel_name>[^\n,]+)'
+    r'|flag[:\s]+(?P<flag>[^\n,]+)'
+    r'|imo[:\s]+(?P<imo>\d+)'
+    r'|call[_\s]sign[:\s]+(?P<call_sign>[A-Z0-9]+)'
+    r'|registration[:\s]+(?P<registration>[^\n,]+))',
+    re.IGNORECASE
+)
+MAX_TEXT_MATCHES = 50  # Limit to reasonable number per field
+
 def extract_vessels_from_text(text: str, pdf_source: str) -> List[Dict[str, str]]:
     """Extract vessel information from free text using patterns"""
     vessels = []
 
-    # Common vessel data patterns
-    patterns = {
-        'vessel_name': r'(?:vessel|ship|boat)\s+name[:\s]+([^\n,]+)',
-        'flag': r'flag[:\s]+([^\n,]+)',
-        'imo': r'imo[:\s]+(\d+)',
-        'call_sign': r'call[_\s]sign[:\s]+([A-Z0-9]+)',
-        'registration': r'registration[:\s]+([^\n,]+)',
-    }
-
     # Try to find structured vessel entries
     text_lower = text.lower()
 
-    for pattern_name, regex in patterns.items():
-        matches = re.findall(regex, text_lower, re.IGNORECASE)
-        if matches:
-            # Create minimal vessel records
-            for match in matches[:50]:  # Limit to reasonable number
-                vessel = {
-                    'pdf_source': pdf_source,
-                    pattern_name: match.strip(),
-                    'extraction_method': 'text_pattern'
-                }
-                vessels.append(vessel)
+    matches = {field: [] for field in VESSEL_TEXT_PATTERN.groupindex}
+    # Matches of the same field never overlap, as with a separate findall per pattern
+    next_start = dict.fromkeys(matches, 0)
+    remaining = MAX_TEXT_MATCHES * len(matches)
+    for match in VESSEL_TEXT_PATTERN.finditer(text_lower):
+        field = match.lastgroup
+        field_matches = matches[field]
+        if match.start() < next_start[field] or len(field_matches) >= MAX_TEXT_MATCHES:
+            continue
+        field_matches.append(match.group(field))
+        next_start[field] = match.end(field)
+        remaining -= 1
+        if not remaining:
+            break  # Every field is already at its limit
+
+    # Create minimal vessel records, grouped by field
+    for field, values in matches.items():
+        for value in values:
+            vessel = {
+                'pdf_source': pdf_source,
+                field: value.strip(),
+                'extraction_method': 'text_pattern'
+            }
+            vessels.append(vessel)
 
     return vessels
 
+# Vessel type directories, in priority order when a path contains more than one
+VESSEL_TYPE_DIRS = ('RFMO', 'COUNTRY', 'INTERGOV')
+
+# (substrings that must all appear in the filename, source); first match wins
+SOURCE_RULES = (
+    (('SEAFO',), 'SEAFO'),
+    (('TWN', 'SIOFA'), 'TWN_SIOFA'),
+    (('TWN', 'PACIFIC'), 'TWN_PACIFIC'),
+    (('TWN',), 'TWN'),
+    (('FRO',), 'FAROE_ISLANDS'),
+)
+
+@lru_cache(maxsize=1024)
+def vessel_type_for_dir(dir_parts: tuple) -> str:
+    """Vessel type for a directory, cached since sibling PDFs share it"""
+    dir_parts = set(dir_parts)
+    return next((t for t in VESSEL_TYPE_DIRS if t in dir_parts), 'MISC')
+
 def determine_vessel_type_and_source(pdf_path: Path) -> tuple[str, str]:
     """Determine vessel type and source based on file path and name"""
-    path_parts = pdf_path.parts
     filename = pdf_path.stem.upper()
 
     # Determine vessel type from path
-    if 'RFMO' in path_parts:
-        vessel_type = 'RFMO'
-    elif 'COUNTRY' in path_parts:
-        vessel_type = 'COUNTRY'
-    elif 'INTERGOV' in path_parts:
-        vessel_type = 'INTERGOV'
-    else:
-        vessel_type = 'MISC'
-
-    # Determine source from filename
-    if 'SEAFO' in filename:
-        source = 'SEAFO'
-    elif 'TWN' in filename:
-        if 'SIOFA' in filename:
-            source = 'TWN_SIOFA'
-        elif 'PACIFIC' in filename:
-            source = 'TWN_PACIFIC'
-        else:
-            source = 'TWN'
-    elif 'FRO' in filename:
-        source = 'FAROE_ISLANDS'
-    else:
-        source = filename.split('_')[0]
+    vessel_type = vessel_type_for_dir(pdf_path.parent.parts)
+
+    # Determine source from filename, defaulting to its first '_' segment
+    source = next((source for keys, source in SOURCE_RULES if all(key in filename for key in keys)),
+                  filename.partition('_')[0])
 
     return vessel_type, source
 
-def process_pdf(pdf_path: Path) -> bool:
-    """Process a single PDF file"""
+def process_pdf(pdf_path: Path) -> Optional[Tuple[Path, List[Dict[str, str]]]]:
+    """Process a single PDF file
+
+    Returns the output CSV path and the cleaned vessel rows, or None on failure.
+    PDFs of the same source share an output file, so writing is left to
+    write_outputs in the parent process.
+    """
     print(f"\n📄 Processing: {pdf_path.name}")
 
+    temp_dir = None
     try:
         vessel_type, source = determine_vessel_type_and_source(pdf_path)
 
@@ -263,25 +371,25 @@ def process_pdf(pdf_path: Path) -> bool:
         output_base = PROCESSED_ROOT / "vessels" / vessel_type / "cleaned"
         output_base.mkdir(parents=True, exist_ok=True)
 
-        temp_dir = output_base / "temp_pdf_processing"
-        temp_dir.mkdir(exist_ok=True)
+        # Per-PDF scratch directory, since PDFs of one vessel type are processed concurrently
+        temp_dir = Path(tempfile.mkdtemp(prefix="temp_pdf_processing_", dir=output_base))
 
         # Extract content using docling
-        extracted_files = extract_with_docling(pdf_path, temp_dir)
+        extracted = extract_with_docling(pdf_path, temp_dir)
 
-        if not extracted_files:
+        if not extracted:
             print(f"   ❌ No content extracted from {pdf_path.name}")
-            return False
+            return None
 
-        # Parse vessel data from extracted files
+        # Parse vessel data from the extracted content
         all_vessels = []
 
-        if 'json' in extracted_files:
-            vessels = parse_vessel_data_from_json(extracted_files['json'], pdf_path.name)
+        if 'json' in extracted:
+            vessels = parse_vessel_data_from_json(extracted['json'], pdf_path.name)
             all_vessels.extend(vessels)
 
-        if 'md' in extracted_files:
-            vessels = parse_vessel_data_from_markdown(extracted_files['md'], pdf_path.name)
+        if 'md' in extracted:
+            vessels = parse_vessel_data_from_markdown(extracted['md'], pdf_path.name)
             all_vessels.extend(vessels)
 
         # Also try table-specific extraction
@@ -311,60 +419,74 @@ def process_pdf(pdf_path: Path) -> bool:
 
         if not cleaned_vessels:
             print(f"   ⚠️ No vessel data found in {pdf_path.name}")
-            return False
+            return None
 
-        # Write to CSV
         output_file = output_base / f"{source.lower()}_vessels_cleaned.csv"
-
-        if cleaned_vessels:
-            fieldnames = set()
-            for vessel in cleaned_vessels:
-                fieldnames.update(vessel.keys())
-            fieldnames = sorted(list(fieldnames))
-
-            with output_file.open('w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(cleaned_vessels)
-
-        # Clean up temp files
-        for temp_file in extracted_files.values():
-            if temp_file.exists():
-                temp_file.unlink()
-        if temp_dir.exists():
-            temp_dir.rmdir()
-
-        print(f"✅ Processed {len(cleaned_vessels)} vessels → {output_file.name}")
-        return True
+        print(f"✅ Processed {len(cleaned_vessels)} vessels from {pdf_path.name}")
+        return output_file, cleaned_vessels
 
     except Exception as e:
         print(f"❌ Failed to process {pdf_path.name}: {e}")
-        return False
+        return None
+
+    finally:
+        # Clean up temp files
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+def write_outputs(results: List[Optional[Tuple[Path, List[Dict[str, str]]]]]):
+    """Write one CSV per output file, with the rows of its PDFs in input order"""
+    outputs = {}
+    for result in results:
+        if result is not None:
+            output_file, vessels = result
+            outputs.setdefault(output_file, []).extend(vessels)
+
+    for output_file, vessels in outputs.items():
+        fieldnames = sorted({field for vessel in vessels for field in vessel})
+        with output_file.open('w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows([vessel.get(field, '') for field in fieldnames] for vessel in vessels)
+        print(f"💾 Wrote {len(vessels)} vessels → {output_file.name}")
+
+def process_pdf_group(pdf_paths: List[Path]) -> List[Optional[Tuple[Path, List[Dict[str, str]]]]]:
+    """Process PDFs that share a file stem one after another
+
+    doc-extract writes every PDF's output to ~/Documents/extracted/{stem}.*, so
+    two PDFs with the same stem must not be extracted at the same time.
+    """
+    return [process_pdf(pdf_path) for pdf_path in pdf_paths]
 
 def main():
     """Process all vessel PDFs"""
     print("📄 Processing vessel PDFs with docling-granite...")
 
-    # Find all PDF files
-    pdf_files = []
-    pdf_files.extend(RAW_ROOT.rglob("*.pdf"))
-
-    if not pdf_files:
+    # Each PDF is independent and mostly waits on docling, so run them side by
+    # side; sorting keeps the run order and logs deterministic
+    pdf_files = sorted(RAW_ROOT.rglob("*.pdf"))
+    groups = {}
+    for pdf_path in pdf_files:
+        groups.setdefault(pdf_path.stem, []).append(pdf_path)
+
+    max_workers = max(1, min(os.cpu_count() or 1, DOCLING_WORKERS))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        group_results = executor.map(process_pdf_group, groups.values())
+        results_by_pdf = {pdf_path: result
+                          for pdf_paths, results in zip(groups.values(), group_results)
+                          for pdf_path, result in zip(pdf_paths, results)}
+    results = [results_by_pdf[pdf_path] for pdf_path in pdf_files]
+
+    if not results:
         print("⚠️ No PDF files found")
         return
 
-    print(f"Found {len(pdf_files)} PDF files to process")
-
-    successful = 0
-    failed = 0
+    write_outputs(results)
 
-    for pdf_file in sorted(pdf_files):
-        if process_pdf(pdf_file):
-            successful += 1
-        else:
-            failed += 1
+    successful = sum(result is not None for result in results)
+    failed = len(results) - successful
 
-    print(f"\n📊 PDF Processing Complete:")
+    print(f"\n📊 PDF Processing Complete: {len(results)} PDF files")
     print(f"   ✅ Successful: {successful}")
     print(f"   ❌ Failed: {failed}")
     print(f"   📁 Output: {PROCESSED_ROOT}/vessels/[TYPE]/cleaned/")
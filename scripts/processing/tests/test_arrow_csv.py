@@ -0,0 +1,65 @@
+import csv
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import arrow_csv
+
+
+ROWS = [
+    ['PAN', '', True, date(2017, 11, 16)],
+    ['a,b', None, False, None],
+    ['say "hi"', 'two\nlines', True, None],
+]
+
+
+class WriteTableTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.table = pa.table({
+            'code': pa.array([row[0] for row in ROWS]),
+            'note': pa.array([row[1] for row in ROWS]),
+            'flag': pa.array([row[2] for row in ROWS]),
+            'day': pa.array([row[3] for row in ROWS], type=pa.date32()),
+        })
+
+    def expected(self, lineterminator):
+        out = io.StringIO(newline='')
+        writer = csv.writer(out, lineterminator=lineterminator)
+        writer.writerow(self.table.column_names)
+        writer.writerows(['' if value is None else value for value in row] for row in ROWS)
+        return out.getvalue()
+
+    def test_matches_csv_module(self):
+        path = os.path.join(self.tmp, 'out.csv')
+        arrow_csv.write_table(self.table, path)
+        with open(path, newline='', encoding='utf-8') as fh:
+            self.assertEqual(fh.read(), self.expected('\r\n'))
+
+    def test_empty_and_null_cells_are_unquoted(self):
+        path = os.path.join(self.tmp, 'out.csv')
+        arrow_csv.write_table(self.table, path, lineterminator='\n')
+        with open(path, newline='', encoding='utf-8') as fh:
+            lines = fh.read().split('\n')
+        self.assertEqual(lines[1], 'PAN,,True,2017-11-16')
+        self.assertEqual(lines[2], '"a,b",,False,')
+
+    def test_gz_path_is_compressed(self):
+        path = os.path.join(self.tmp, 'out.csv.gz')
+        arrow_csv.write_table(self.table, path, lineterminator='\n')
+        with gzip.open(path, 'rt', newline='', encoding='utf-8') as fh:
+            self.assertEqual(fh.read(), self.expected('\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# clean_asfis_data creates its output directories at import time
+_SCRATCH = tempfile.mkdtemp()
+os.environ.setdefault("EBISU_RAW_ROOT", _SCRATCH)
+os.environ.setdefault("EBISU_PROCESSED_ROOT", _SCRATCH)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import clean_asfis_data as asfis
+
+
+# A sample of entries carried over from the table that used to be hard-coded
+KNOWN_EDGE_CASES = {
+    "Siluriformes (=Siluroidei)": ("Family", "Siluridae", ""),
+    "Algae": ("Kingdom", "Chromista", ""),
+    "Angiospermae": ("Class", "Magnoliopsida", ""),
+    "Oreochromis aureus x O. niloticus": ("Species", "Oreochromis aureus", "Oreochromis niloticus"),
+}
+
+
+def tearDownModule():
+    shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+
+class EdgeCasesTest(unittest.TestCase):
+    def test_every_entry_has_the_expected_fields(self):
+        for name, mapping in asfis.load_edge_cases().items():
+            with self.subTest(name=name):
+                self.assertEqual(set(mapping), set(asfis.EDGE_CASE_FIELDS))
+                self.assertTrue(all(isinstance(value, str) for value in mapping.values()))
+
+    def test_known_entries(self):
+        edge_cases = asfis.load_edge_cases()
+        for name, values in KNOWN_EDGE_CASES.items():
+            with self.subTest(name=name):
+                self.assertEqual(tuple(edge_cases[name][field] for field in asfis.EDGE_CASE_FIELDS), values)
+
+    def test_odontoceti_is_a_suborder(self):
+        # Was hard-coded with the name itself as its rank
+        self.assertEqual(asfis.load_edge_cases()["Odontoceti"]["currentRank"], "Suborder")
+
+    def test_entry_missing_a_field_is_rejected(self):
+        edge_cases = {"Odontoceti": {"speciesScientificNames[0]": "Odontoceti", "currentRank": "Suborder"}}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as fh:
+            json.dump(edge_cases, fh)
+        self.addCleanup(os.remove, fh.name)
+        with self.assertRaisesRegex(ValueError, r"speciesScientificNames\[1\]"):
+            asfis.load_edge_cases(fh.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
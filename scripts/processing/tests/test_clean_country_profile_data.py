@@ -0,0 +1,27 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import clean_country_profile_data as ccp
+
+
+DATE_INPUTS = ['2024-02-29', '2024-02-30', '2023-02-29', '1999-12-31', ' 2010-06-01 ',
+               '2010-13-01', '01/06/2010', '', None, '2024-02-30']
+
+
+class ParseDatesTest(unittest.TestCase):
+    def test_matches_parse_date_text(self):
+        arrow = ccp.parse_dates(ccp.pa.chunked_array([DATE_INPUTS], type=ccp.pa.string()))
+        parsed_text = [value.isoformat() if value is not None else '' for value in arrow.to_pylist()]
+        expected = [ccp.parse_date_text(value) if value is not None else '' for value in DATE_INPUTS]
+        self.assertEqual(parsed_text, expected)
+
+    def test_impossible_dates_are_null(self):
+        arrow = ccp.parse_dates(ccp.pa.chunked_array([['2024-02-30', '2023-02-29']], type=ccp.pa.string()))
+        self.assertEqual(arrow.to_pylist(), [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
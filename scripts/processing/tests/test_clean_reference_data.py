@@ -0,0 +1,50 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# clean_reference_data creates its output directory at import time
+_SCRATCH = tempfile.mkdtemp()
+os.environ.setdefault("EBISU_RAW_ROOT", _SCRATCH)
+os.environ.setdefault("EBISU_PROCESSED_ROOT", _SCRATCH)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import clean_reference_data as ref
+
+
+# value, width -> normalized code, as the original value.replace('.0', '').strip() + zfill gave
+CODES = [
+    (("4", 3), "004"),
+    (("27.0", 2), "27"),
+    (("27.00", 2), "270"),
+    (("1.05", 2), "15"),
+    ((" 7.0 ", 2), "07"),
+    (("", 2), ""),
+    ((".0", 2), ""),
+    (("ABC", 2), "ABC"),
+]
+
+
+def tearDownModule():
+    shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+
+class NormalizeCodeTest(unittest.TestCase):
+    def test_matches_original_semantics(self):
+        for (value, width), expected in CODES:
+            with self.subTest(value=value):
+                self.assertEqual(ref.normalize_code(value, width), expected)
+
+    @unittest.skipIf(ref.pa is None, "pyarrow is not installed")
+    def test_array_version_agrees(self):
+        for width in (2, 3):
+            values = [value for (value, _), _ in CODES]
+            with self.subTest(width=width):
+                self.assertEqual(ref.normalize_code_array(ref.pa.array(values), width).to_pylist(),
+                                 [ref.normalize_code(value, width) for value in values])
+
+
+if __name__ == '__main__':
+    unittest.main()
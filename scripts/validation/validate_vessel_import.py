@@ -2,17 +2,120 @@
 """
 Enhanced vessel import validation with comprehensive error tracking
 """
+import numpy as np
 import pandas as pd
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import json
 import sys
 import os
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from io import BytesIO
+from typing import Dict, Iterator, List, Tuple, Optional
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ModuleNotFoundError:
+    pa = None  # Fall back to str columns and pandas' own record export
+
+try:
+    from numba import njit
+except ModuleNotFoundError:
+    njit = None  # Fall back to the NumPy check digit calculation
+
+# validation_status categories; the row loop stores the codes (positions) directly
+VALIDATION_STATUSES = ['VALID', 'WARNING', 'ERROR']
+STATUS_WARNING = VALIDATION_STATUSES.index('WARNING')
+STATUS_ERROR = VALIDATION_STATUSES.index('ERROR')
+
+# Common non-ISO flag codes, tried when a code matches no alpha-3 or alpha-2 code
+FLAG_CODE_ALIASES = {
+    'UK': 'GBR',
+    'ENG': 'GBR',
+    'SCO': 'GBR',
+    'GER': 'DEU',
+    'NED': 'NLD',
+    'POR': 'PRT'
+}
+
+# Rows per chunk when streaming the input CSV
+CHUNK_SIZE = 100_000
+
+# Chunks validated in parallel; main keeps at most twice this many in flight
+MAX_WORKERS = os.cpu_count() or 1
+
+# Minimum share of VALID records for main to commit the staged rows
+MIN_VALID_RATE = 0.90
+
+# Columns check_duplicates needs from every chunk
+DUPLICATE_KEY_COLUMNS = ['imo', 'vessel_name', 'flag_code']
+
+# Everything but ASCII digits; not \D, which would keep other Unicode digits
+_NON_DIGIT_RE = re.compile(r'[^0-9]')
+
+# IMO check digit weights for the first six digits
+IMO_WEIGHTS = np.array([7, 6, 5, 4, 3, 2], dtype=np.int32)
+
+if njit is not None:
+    # Serial: chunks are already validated in MAX_WORKERS processes, and numba
+    # threads in every one of them would oversubscribe the CPUs
+    @njit(cache=True)
+    def imo_check_digits(digits, out):
+        """Write the expected check digit of each row of an (n, 7) IMO digit array into out"""
+        for i in range(digits.shape[0]):
+            out[i] = (7 * digits[i, 0] + 6 * digits[i, 1] + 5 * digits[i, 2]
+                      + 4 * digits[i, 3] + 3 * digits[i, 4] + 2 * digits[i, 5]) % 10
+else:
+    imo_check_digits = None
+
+def _empty(value) -> bool:
+    """True for a missing (None/NaN/NA) or empty cell; a cheaper scalar check than pd.isna"""
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value) or value == ''
+
+def read_csv_chunks(input_file: str, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the input CSV in chunks of chunksize rows, every column as text
+    
+    With pyarrow the columns are Arrow strings (pd.ArrowDtype), otherwise str.
+    Parsing stays with pandas' C reader either way: it streams in chunks and pads
+    short rows with missing values, where pyarrow's own CSV reader rejects them.
+    """
+    # Force all columns to be read as strings to prevent data corruption
+    dtype = pd.ArrowDtype(pa.string()) if pa is not None else str
+    yield from pd.read_csv(input_file, dtype=dtype, chunksize=chunksize)
+
+def sample_records(df: pd.DataFrame) -> List[dict]:
+    """Report rows as dicts, with missing cells (NaN or NA) as None so they dump as null"""
+    if pa is not None:
+        # Arrow turns the columns into Python values directly, skipping to_dict's per-cell boxing
+        return pa.Table.from_pandas(df, preserve_index=False).to_pylist()
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def encode_payloads(payloads: List[Optional[list]]) -> List[Optional[str]]:
+    """JSON-encode per-row error/warning lists in one pass; rows without any stay None
+
+    The text is compact and not ASCII-escaped, as orjson writes it, with or
+    without orjson installed; the payloads decode to the same values as the
+    spaced json.dumps text staged before.
+    """
+    if orjson is not None:
+        dumps = orjson.dumps
+        return [dumps(p).decode() if p else None for p in payloads]
+    dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    return [dumps(p) if p else None for p in payloads]
 
 class VesselImportValidator:
+    # Cached reference tables, shipped to worker processes by reference_tables()
+    REFERENCE_TABLES = ('flag_by_alpha_3', 'flag_by_alpha_2', 'gear_by_code',
+                        'vessel_type_by_code', 'vessel_type_by_alpha')
+    
     def __init__(self, db_config: Dict[str, str]):
         self.db_config = db_config
         self.conn = None
@@ -20,6 +123,14 @@ class VesselImportValidator:
         self.warnings = []
         self.valid_records = 0
         self.invalid_records = 0
+        self.warning_records = 0
+        
+        # Reference tables cached by _load_reference_tables(): code -> (id, canonical code)
+        self.flag_by_alpha_3 = {}
+        self.flag_by_alpha_2 = {}
+        self.gear_by_code = {}
+        self.vessel_type_by_code = {}
+        self.vessel_type_by_alpha = {}
         
     def connect(self):
         """Establish database connection"""
@@ -30,14 +141,64 @@ class VesselImportValidator:
             user=self.db_config['user'],
             password=self.db_config['password']
         )
+        self._load_reference_tables()
+        
+    def reference_tables(self) -> Dict[str, dict]:
+        """The cached reference tables as a picklable dict, for worker processes"""
+        return {name: getattr(self, name) for name in self.REFERENCE_TABLES}
+        
+    @classmethod
+    def from_reference_tables(cls, tables: Dict[str, dict]) -> 'VesselImportValidator':
+        """A validator with no database connection, working from cached reference tables"""
+        validator = cls({})
+        for name, table in tables.items():
+            setattr(validator, name, table)
+        return validator
+        
+    def tallies(self) -> Dict[str, object]:
+        """Running counts and warnings, for merge_tallies in the parent process"""
+        return {
+            'valid_records': self.valid_records,
+            'invalid_records': self.invalid_records,
+            'warning_records': self.warning_records,
+            'warnings': self.warnings
+        }
+        
+    def merge_tallies(self, tallies: Dict[str, object]):
+        """Add the counts and warnings of a chunk validated by a worker"""
+        self.valid_records += tallies['valid_records']
+        self.invalid_records += tallies['invalid_records']
+        self.warning_records += tallies['warning_records']
+        self.warnings.extend(tallies['warnings'])
+        
+    def _load_reference_tables(self):
+        """Cache the country, gear and vessel type reference tables in memory
+        
+        Each table holds at most a few hundred rows, so every code lookup after
+        this is a dict hit instead of a database round-trip.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT id, alpha_3_code, alpha_2_code FROM country_iso")
+            for uuid, alpha_3, alpha_2 in cur.fetchall():
+                self.flag_by_alpha_3.setdefault(alpha_3, (uuid, alpha_3))
+                self.flag_by_alpha_2.setdefault(alpha_2, (uuid, alpha_3))
+                
+            cur.execute("SELECT id, fao_isscfg_code FROM gear_types_fao")
+            for uuid, code in cur.fetchall():
+                self.gear_by_code.setdefault(code, (uuid, code))
+                
+            cur.execute("SELECT id, vessel_type_isscfv_code, vessel_type_isscfv_alpha FROM vessel_types")
+            for uuid, code, alpha in cur.fetchall():
+                self.vessel_type_by_code.setdefault(code, (uuid, code))
+                self.vessel_type_by_alpha.setdefault(alpha, (uuid, code))
         
     def validate_imo(self, imo: str) -> Tuple[bool, Optional[str]]:
         """Validate IMO number format and check digit"""
-        if pd.isna(imo) or imo == '':
+        if _empty(imo):
             return True, None  # Empty is valid
             
         # Clean IMO
-        imo_clean = re.sub(r'[^0-9]', '', str(imo))
+        imo_clean = _NON_DIGIT_RE.sub('', str(imo))
         
         if len(imo_clean) != 7:
             return False, f"Invalid length: {len(imo_clean)}"
@@ -56,63 +217,87 @@ class VesselImportValidator:
         except ValueError:
             return False, "Non-numeric characters"
             
-    def validate_flag_code(self, flag_code: str) -> Tuple[bool, Optional[str], Optional[str]]:
-        """Validate flag code against country_iso table"""
-        if pd.isna(flag_code) or flag_code == '':
-            return True, None, None
-            
-        with self.conn.cursor() as cur:
-            # Check alpha-3
-            cur.execute(
-                "SELECT id, alpha_3_code FROM country_iso WHERE alpha_3_code = %s",
-                (flag_code.upper(),)
-            )
-            result = cur.fetchone()
+    def validate_imo_column(self, imo: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Validate a whole IMO column at once, matching validate_imo per cell
+
+        Returns (imo_validated, imo_errors) object arrays aligned with the column;
+        each row has either a cleaned IMO, an error message, or neither (empty).
+        """
+        n = len(imo)
+        validated = np.full(n, None, dtype=object)
+        errors = np.full(n, None, dtype=object)
+        
+        present = (imo.fillna('') != '').to_numpy(dtype=bool)
+        cleaned = imo.fillna('').astype(str).str.replace(_NON_DIGIT_RE.pattern, '', regex=True).to_numpy(dtype=object)
+        lengths = np.fromiter(map(len, cleaned), dtype=np.int64, count=n)
+        
+        for pos in np.flatnonzero(present & (lengths != 7)):
+            errors[pos] = f"Invalid length: {lengths[pos]}"
             
-            if result:
-                return True, result[0], result[1]
+        candidates = np.flatnonzero(present & (lengths == 7))
+        if len(candidates):
+            # Only ASCII digits survive the cleaning, so each IMO is exactly 7 bytes
+            digits = np.frombuffer(''.join(cleaned[candidates]).encode('ascii'), dtype=np.uint8)
+            digits = digits.reshape(-1, 7).astype(np.int32) - ord('0')
+            if imo_check_digits is not None:
+                calculated = np.empty(len(digits), dtype=np.int32)
+                imo_check_digits(digits, calculated)
+            else:
+                calculated = (digits[:, :6] * IMO_WEIGHTS).sum(axis=1) % 10
+            check = digits[:, 6]
+            ok = calculated == check
+            validated[candidates[ok]] = cleaned[candidates[ok]]
+            for pos, calc, got in zip(candidates[~ok], calculated[~ok], check[~ok]):
+                errors[pos] = f"Invalid check digit: expected {calc}, got {got}"
                 
-            # Check alpha-2
-            cur.execute(
-                "SELECT id, alpha_3_code FROM country_iso WHERE alpha_2_code = %s",
-                (flag_code.upper(),)
-            )
-            result = cur.fetchone()
+        return validated, errors
+        
+    def validate_flag_code(self, flag_code: str) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Validate flag code against the cached country_iso table"""
+        if _empty(flag_code):
+            return True, None, None
             
-            if result:
-                return True, result[0], result[1]
-                
-            # Try common mappings
-            mappings = {
-                'UK': 'GBR',
-                'ENG': 'GBR',
-                'SCO': 'GBR',
-                'GER': 'DEU',
-                'NED': 'NLD',
-                'POR': 'PRT'
-            }
+        result = self._resolve_flag(flag_code.upper())
+        if result:
+            return True, result[0], result[1]
             
-            if flag_code.upper() in mappings:
-                return self.validate_flag_code(mappings[flag_code.upper()])
-                
         return False, None, flag_code
         
+    def _resolve_flag(self, code: str) -> Optional[Tuple[str, str]]:
+        """(id, alpha-3) for an upper-cased flag code, or None when nothing matches"""
+        # Check alpha-3, then alpha-2
+        result = self.flag_by_alpha_3.get(code) or self.flag_by_alpha_2.get(code)
+        
+        # Try common mappings
+        if not result and code in FLAG_CODE_ALIASES:
+            code = FLAG_CODE_ALIASES[code]
+            result = self.flag_by_alpha_3.get(code) or self.flag_by_alpha_2.get(code)
+            
+        return result
+        
     def validate_gear_type(self, gear_code: str) -> Tuple[bool, Optional[str], Optional[str]]:
         """Validate and fuzzy match gear types"""
-        if pd.isna(gear_code) or gear_code == '':
+        if _empty(gear_code):
             return True, None, None
             
-        with self.conn.cursor() as cur:
-            # Exact match
-            cur.execute(
-                "SELECT id, fao_isscfg_code FROM gear_types_fao WHERE fao_isscfg_code = %s",
-                (str(gear_code),)
-            )
-            result = cur.fetchone()
+        # Exact match
+        result = self.gear_by_code.get(str(gear_code))
+        if result:
+            return True, result[0], result[1]
             
-            if result:
-                return True, result[0], result[1]
-                
+        return self.match_gear_fuzzy(gear_code)
+        
+    def match_gear_fuzzy(self, gear_code: str) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Fuzzy match a gear code with no exact match in gear_types_fao
+        
+        A single-code helper for callers of validate_gear_type; validate_dataframe
+        matches all of a chunk's codes at once through fuzzy_gear_matches. Needs a
+        connected validator, not one built by from_reference_tables.
+        """
+        if self.conn is None:
+            raise RuntimeError("match_gear_fuzzy needs a database connection; call connect() first")
+            
+        with self.conn.cursor() as cur:
             # Fuzzy match using trigram similarity
             cur.execute("""
                 SELECT id, fao_isscfg_code, similarity(fao_isscfg_code, %s) as sim
@@ -135,38 +320,89 @@ class VesselImportValidator:
         return False, None, gear_code
         
     def validate_vessel_type(self, vessel_type_code: str) -> Tuple[bool, Optional[str], Optional[str]]:
-        """Validate vessel type against reference table"""
-        if pd.isna(vessel_type_code) or vessel_type_code == '':
+        """Validate vessel type against the cached reference table"""
+        if _empty(vessel_type_code):
             return True, None, None
             
-        with self.conn.cursor() as cur:
-            # Try exact match on code
-            cur.execute(
-                "SELECT id, vessel_type_isscfv_code FROM vessel_types WHERE vessel_type_isscfv_code = %s",
-                (str(vessel_type_code),)
-            )
-            result = cur.fetchone()
+        # Try exact match on code, then on alpha code
+        result = (self.vessel_type_by_code.get(str(vessel_type_code))
+                  or self.vessel_type_by_alpha.get(str(vessel_type_code)))
+        if result:
+            return True, result[0], result[1]
             
+        return False, None, vessel_type_code
+        
+    def lookup_flag_codes(self, upper_flag_codes: pd.Series) -> Dict[str, str]:
+        """Resolve every distinct (already upper-cased) flag code once; returns code -> country_iso id"""
+        flag_map = {}
+        for code in upper_flag_codes.dropna().unique().tolist():
+            result = self._resolve_flag(code) if code != '' else None
             if result:
-                return True, result[0], result[1]
-                
-            # Try match on alpha code
-            cur.execute(
-                "SELECT id, vessel_type_isscfv_code FROM vessel_types WHERE vessel_type_isscfv_alpha = %s",
-                (str(vessel_type_code),)
-            )
-            result = cur.fetchone()
-            
+                flag_map[code] = result[0]
+        return flag_map
+        
+    def lookup_gear_types(self, gear_codes: pd.Series) -> Dict[str, str]:
+        """Resolve exact gear code matches for every distinct code
+        
+        Codes missing from the result still go through the fuzzy match.
+        """
+        gear_map = {}
+        for code in gear_codes.dropna().astype(str).unique().tolist():
+            result = self.gear_by_code.get(code)
             if result:
-                return True, result[0], result[1]
-                
-        return False, None, vessel_type_code
+                gear_map[code] = result[0]
+        return gear_map
+        
+    def match_gear_fuzzy_batch(self, gear_codes: List[str]) -> Dict[str, Tuple[str, str, float]]:
+        """Fuzzy match many unknown gear codes with a single trigram query
+        
+        Returns a dict of gear code -> (id, matched code, similarity) holding the
+        best match per code, with the same 0.6 threshold as match_gear_fuzzy.
+        """
+        if not gear_codes:
+            return {}
+            
+        with self.conn.cursor() as cur:
+            # The % operator lets the planner use the gin_trgm_ops index
+            rows = execute_values(cur, """
+                WITH q(code) AS (VALUES %s)
+                SELECT DISTINCT ON (q.code) q.code, g.id, g.fao_isscfg_code,
+                       similarity(g.fao_isscfg_code, q.code) AS sim
+                FROM q JOIN gear_types_fao g ON g.fao_isscfg_code %% q.code
+                WHERE similarity(g.fao_isscfg_code, q.code) > 0.6
+                ORDER BY q.code, sim DESC
+            """, [(code,) for code in gear_codes], page_size=len(gear_codes), fetch=True)
+            
+        return {code: (uuid, matched, sim) for code, uuid, matched, sim in rows}
+        
+    def fuzzy_gear_matches(self, df: pd.DataFrame) -> Dict[str, Tuple[str, str, float]]:
+        """Batch fuzzy matches for the gear codes in df that have no exact match"""
+        if 'gear_type' not in df.columns:
+            return {}
+        unresolved = [c for c in df['gear_type'].dropna().unique().tolist()
+                      if c != '' and c not in self.gear_by_code]
+        return self.match_gear_fuzzy_batch(unresolved)
+        
+    def lookup_vessel_types(self, vessel_type_codes: pd.Series) -> Dict[str, str]:
+        """Resolve every distinct vessel type code (ISSCFV code or alpha) once"""
+        vessel_type_map = {}
+        for code in vessel_type_codes.dropna().astype(str).unique().tolist():
+            is_valid, uuid, _ = self.validate_vessel_type(code)
+            if uuid is not None:
+                vessel_type_map[code] = uuid
+        return vessel_type_map
+        
+    @staticmethod
+    def map_codes(codes: pd.Series, lookup: Dict[str, str]) -> np.ndarray:
+        """Map a code column through lookup; missing or unmatched codes become None"""
+        mapped = codes.map(lookup).astype(object)
+        return mapped.where(mapped.notna(), None).to_numpy()
         
     def check_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
         """Check for duplicate vessels by IMO, name+flag combination"""
-        # Check IMO duplicates
-        imo_dups = df[df['imo'].notna()].groupby('imo').size()
-        imo_dups = imo_dups[imo_dups > 1]
+        # Check IMO duplicates; sort_index keeps the warnings in key order
+        imo_counts = df['imo'].dropna().value_counts()
+        imo_dups = imo_counts[imo_counts > 1].sort_index()
         
         for imo, count in imo_dups.items():
             self.warnings.append({
@@ -176,8 +412,8 @@ class VesselImportValidator:
             })
             
         # Check name+flag duplicates
-        name_flag_dups = df.groupby(['vessel_name', 'flag_code']).size()
-        name_flag_dups = name_flag_dups[name_flag_dups > 1]
+        name_flag_counts = df[['vessel_name', 'flag_code']].value_counts()
+        name_flag_dups = name_flag_counts[name_flag_counts > 1].sort_index()
         
         for (name, flag), count in name_flag_dups.items():
             self.warnings.append({
@@ -189,120 +425,190 @@ class VesselImportValidator:
             
         return df
         
-    def validate_dataframe(self, df: pd.DataFrame, source_file: str) -> pd.DataFrame:
-        """Validate entire dataframe with comprehensive checks"""
-        print(f"Validating {len(df)} records from {source_file}")
+    def validate_dataframe(self, df: pd.DataFrame, source_file: str,
+                           find_duplicates: bool = True,
+                           gear_fuzzy: Optional[Dict[str, Tuple[str, str, float]]] = None) -> pd.DataFrame:
+        """Validate entire dataframe with comprehensive checks
         
-        # Add validation columns
-        df['validation_status'] = 'VALID'
-        df['validation_errors'] = None
-        df['validation_warnings'] = None
-        df['imo_validated'] = None
-        df['flag_uuid'] = None
-        df['gear_type_uuid'] = None
-        df['vessel_type_uuid'] = None
+        Pass find_duplicates=False when validating one chunk of a larger file and
+        run check_duplicates over the key columns of every chunk afterwards.
+        gear_fuzzy takes precomputed fuzzy_gear_matches(df), so a validator
+        without a connection (see validate_chunk) never needs the database.
+        """
+        print(f"Validating {len(df)} records from {source_file}")
         
         # Check for duplicates
-        df = self.check_duplicates(df)
+        if find_duplicates:
+            df = self.check_duplicates(df)
+        
+        # Validate each record, collecting results per column and assigning them in bulk afterwards
+        n = len(df)
+        status = np.zeros(n, dtype=np.int8)  # VALID
+        errors_col = [None] * n
+        warnings_col = [None] * n
+        if 'imo' in df.columns:
+            imo_out, imo_errors = self.validate_imo_column(df['imo'])
+        else:
+            imo_out, imo_errors = [None] * n, None
+        flag_out = [None] * n
+        gear_out = [None] * n
+        vtype_out = [None] * n
+        
+        cols = {name: i for i, name in enumerate(df.columns)}
+        name_idx = cols.get('vessel_name')
+        flag_idx = cols.get('flag_code')
+        gear_idx = cols.get('gear_type')
+        vtype_idx = cols.get('vessel_type')
         
-        # Validate each record
-        for idx, row in df.iterrows():
+        # Resolve reference codes once per distinct value instead of once per row
+        if flag_idx is not None:
+            # Upper-case the column once, in Arrow/C, rather than per row
+            upper_flags = df['flag_code'].str.upper()
+            flag_uuids = self.map_codes(upper_flags, self.lookup_flag_codes(upper_flags))
+        if gear_idx is not None:
+            gear_uuids = self.map_codes(df['gear_type'], self.lookup_gear_types(df['gear_type']))
+            if gear_fuzzy is None:
+                gear_fuzzy = self.fuzzy_gear_matches(df)
+        if vtype_idx is not None:
+            vtype_uuids = self.map_codes(df['vessel_type'], self.lookup_vessel_types(df['vessel_type']))
+        
+        for i, row in enumerate(df.itertuples(index=False, name=None)):
             errors = []
             warnings = []
             
             # Validate vessel name
-            if pd.isna(row.get('vessel_name')) or str(row.get('vessel_name')).strip() == '':
+            vessel_name = row[name_idx] if name_idx is not None else None
+            if _empty(vessel_name) or str(vessel_name).strip() == '':
                 errors.append({
                     'field': 'vessel_name',
                     'error': 'Missing vessel name'
                 })
             
-            # Validate IMO
-            if 'imo' in row and pd.notna(row['imo']):
-                is_valid, result = self.validate_imo(row['imo'])
-                if not is_valid:
-                    warnings.append({
-                        'field': 'imo',
-                        'error': result
-                    })
-                else:
-                    df.at[idx, 'imo_validated'] = result
+            # IMO was validated for the whole column above
+            if imo_errors is not None and imo_errors[i] is not None:
+                warnings.append({
+                    'field': 'imo',
+                    'error': imo_errors[i]
+                })
                     
             # Validate flag
-            if 'flag_code' in row:
-                is_valid, uuid, code = self.validate_flag_code(row.get('flag_code'))
-                if is_valid:
-                    df.at[idx, 'flag_uuid'] = uuid
-                elif pd.notna(row.get('flag_code')):
+            if flag_idx is not None:
+                flag_code = row[flag_idx]
+                if flag_uuids[i] is not None:
+                    flag_out[i] = flag_uuids[i]
+                elif not _empty(flag_code):
                     errors.append({
                         'field': 'flag_code',
-                        'error': f'Unknown flag code: {code}'
+                        'error': f'Unknown flag code: {flag_code}'
                     })
                     
-            # Validate gear type
-            if 'gear_type' in row:
-                is_valid, uuid, code = self.validate_gear_type(row.get('gear_type'))
-                if is_valid:
-                    df.at[idx, 'gear_type_uuid'] = uuid
-                elif pd.notna(row.get('gear_type')):
-                    warnings.append({
-                        'field': 'gear_type',
-                        'warning': f'Unknown gear type: {code}'
-                    })
+            # Validate gear type, falling back to the batched fuzzy match for unknown codes
+            if gear_idx is not None:
+                gear_type = row[gear_idx]
+                if gear_uuids[i] is not None:
+                    gear_out[i] = gear_uuids[i]
+                elif not _empty(gear_type):
+                    fuzzy = gear_fuzzy.get(gear_type)
+                    if fuzzy is not None:
+                        uuid, matched, similarity = fuzzy
+                        self.warnings.append({
+                            'type': 'GEAR_FUZZY_MATCH',
+                            'original': gear_type,
+                            'matched': matched,
+                            'similarity': similarity
+                        })
+                        gear_out[i] = uuid
+                    else:
+                        warnings.append({
+                            'field': 'gear_type',
+                            'warning': f'Unknown gear type: {gear_type}'
+                        })
                     
             # Validate vessel type
-            if 'vessel_type' in row:
-                is_valid, uuid, code = self.validate_vessel_type(row.get('vessel_type'))
-                if is_valid:
-                    df.at[idx, 'vessel_type_uuid'] = uuid
-                elif pd.notna(row.get('vessel_type')):
+            if vtype_idx is not None:
+                vessel_type = row[vtype_idx]
+                if vtype_uuids[i] is not None:
+                    vtype_out[i] = vtype_uuids[i]
+                elif not _empty(vessel_type):
                     warnings.append({
                         'field': 'vessel_type',
-                        'warning': f'Unknown vessel type: {code}'
+                        'warning': f'Unknown vessel type: {vessel_type}'
                     })
                     
             # Update validation status
             if errors:
-                df.at[idx, 'validation_status'] = 'ERROR'
-                df.at[idx, 'validation_errors'] = json.dumps(errors)
+                status[i] = STATUS_ERROR
+                errors_col[i] = errors
                 self.invalid_records += 1
             elif warnings:
-                df.at[idx, 'validation_status'] = 'WARNING'
-                df.at[idx, 'validation_warnings'] = json.dumps(warnings)
+                status[i] = STATUS_WARNING
+                warnings_col[i] = warnings
                 self.valid_records += 1
+                self.warning_records += 1
             else:
                 self.valid_records += 1
+        
+        errors_col = encode_payloads(errors_col)
+        warnings_col = encode_payloads(warnings_col)
+        
+        # Add validation columns, each assigned once from its list
+        df['validation_status'] = pd.Categorical.from_codes(status, categories=VALIDATION_STATUSES)
+        
+        # Object columns keep None (null in the report) for missing values
+        for column, values in (('validation_errors', errors_col),
+                               ('validation_warnings', warnings_col),
+                               ('imo_validated', imo_out),
+                               ('flag_uuid', flag_out),
+                               ('gear_type_uuid', gear_out),
+                               ('vessel_type_uuid', vtype_out)):
+            df[column] = pd.Series(values, index=df.index, dtype=object)
                 
         return df
         
+    @staticmethod
+    def sample_by_status(df: pd.DataFrame, limit: int = 10) -> Dict[str, pd.DataFrame]:
+        """First `limit` ERROR and WARNING rows, from a single pass over validation_status"""
+        positions = df.groupby('validation_status', sort=False, observed=True).indices
+        empty = np.empty(0, dtype=np.intp)
+        return {status: df.iloc[positions.get(status, empty)[:limit]] for status in ('ERROR', 'WARNING')}
+        
     def generate_report(self, df: pd.DataFrame, output_file: str):
-        """Generate comprehensive validation report"""
+        """Generate comprehensive validation report
+        
+        Counts come from the validator's running totals, so df only has to hold the
+        rows to sample from (the first ERROR and WARNING rows are enough).
+        """
+        total_records = self.valid_records + self.invalid_records
         report = {
             'timestamp': datetime.now().isoformat(),
-            'total_records': len(df),
+            'total_records': total_records,
             'valid_records': self.valid_records,
             'invalid_records': self.invalid_records,
-            'warning_records': len(df[df['validation_status'] == 'WARNING']),
-            'validation_rate': (self.valid_records / len(df) * 100) if len(df) > 0 else 0,
+            'warning_records': self.warning_records,
+            'validation_rate': (self.valid_records / total_records * 100) if total_records > 0 else 0,
             'errors_by_type': {},
             'warnings_by_type': {},
             'sample_errors': [],
             'sample_warnings': []
         }
         
+        samples = self.sample_by_status(df)
+        
         # Aggregate errors
-        error_df = df[df['validation_status'] == 'ERROR']
-        if len(error_df) > 0:
-            report['sample_errors'] = error_df.head(10).to_dict('records')
+        if len(samples['ERROR']) > 0:
+            report['sample_errors'] = sample_records(samples['ERROR'])
             
-        # Aggregate warnings  
-        warning_df = df[df['validation_status'] == 'WARNING']
-        if len(warning_df) > 0:
-            report['sample_warnings'] = warning_df.head(10).to_dict('records')
+        # Aggregate warnings
+        if len(samples['WARNING']) > 0:
+            report['sample_warnings'] = sample_records(samples['WARNING'])
             
-        # Write report
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        # Write report as UTF-8 JSON; non-ASCII text is not \u-escaped on either path
+        if orjson is not None:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
             
         print(f"\nValidation Report:")
         print(f"Total Records: {report['total_records']}")
@@ -313,8 +619,13 @@ class VesselImportValidator:
         
         return report
         
-    def save_to_staging(self, df: pd.DataFrame, staging_table: str = 'vessel_staging_validated'):
-        """Save validated data to staging table"""
+    def save_to_staging(self, df: pd.DataFrame, staging_table: str = 'vessel_staging_validated',
+                        commit: bool = True):
+        """Save validated data to staging table
+        
+        With commit=False the rows are left in the open transaction, so several
+        chunks can be committed (or rolled back) together.
+        """
         # Only save records that passed validation or have warnings
         valid_df = df[df['validation_status'].isin(['VALID', 'WARNING'])]
         
@@ -327,10 +638,9 @@ class VesselImportValidator:
             'validation_warnings'
         ]
         
-        # Create CSV in memory
-        from io import StringIO
-        csv_buffer = StringIO()
-        valid_df[columns].to_csv(csv_buffer, index=False, header=False)
+        # Encode the CSV straight to UTF-8 bytes so COPY reads it without another text pass
+        csv_buffer = BytesIO()
+        valid_df[columns].to_csv(csv_buffer, index=False, header=False, encoding='utf-8', lineterminator='\n')
         csv_buffer.seek(0)
         
         with self.conn.cursor() as cur:
@@ -339,8 +649,25 @@ class VesselImportValidator:
                 FROM STDIN WITH CSV
             """, csv_buffer)
             
-        self.conn.commit()
-        print(f"Successfully saved {len(valid_df)} records to staging")
+        if commit:
+            self.conn.commit()
+            print(f"Successfully saved {len(valid_df)} records to staging")
+        return len(valid_df)
+
+# Per-process state for validate_chunk, set once by init_worker
+_worker_tables = None
+
+def init_worker(tables: Dict[str, dict]):
+    """ProcessPoolExecutor initializer: receive the reference tables once per process"""
+    global _worker_tables
+    _worker_tables = tables
+
+def validate_chunk(chunk: pd.DataFrame, source_file: str,
+                   gear_fuzzy: Dict[str, Tuple[str, str, float]]) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """Validate one chunk in a worker process; returns the frame and the chunk's tallies"""
+    validator = VesselImportValidator.from_reference_tables(_worker_tables)
+    validated = validator.validate_dataframe(chunk, source_file, find_duplicates=False, gear_fuzzy=gear_fuzzy)
+    return validated, validator.tallies()
 
 def main():
     # Database configuration
@@ -370,20 +697,49 @@ def main():
     validator = VesselImportValidator(db_config)
     validator.connect()
     
-    # Read and validate data
-    # Force all columns to be read as strings to prevent data corruption
-    df = pd.read_csv(input_file, dtype=str)
-    validated_df = validator.validate_dataframe(df, input_file)
+    # Read and validate data in chunks so memory stays bounded by CHUNK_SIZE.
+    # Chunks are validated in worker processes; the fuzzy gear query needs the
+    # connection, so it runs here before a chunk is handed off. Results are
+    # collected in input order and copied to staging inside one transaction,
+    # which is only committed once the whole file has passed the threshold.
+    samples = []
+    duplicate_keys = []
+    saved = 0
+    
+    def collect(future):
+        nonlocal saved
+        validated, tallies = future.result()
+        validator.merge_tallies(tallies)
+        samples.extend(validator.sample_by_status(validated).values())
+        duplicate_keys.append(validated[DUPLICATE_KEY_COLUMNS])
+        saved += validator.save_to_staging(validated, commit=False)
+        
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=init_worker,
+                             initargs=(validator.reference_tables(),)) as executor:
+        for chunk in read_csv_chunks(input_file, CHUNK_SIZE):
+            gear_fuzzy = validator.fuzzy_gear_matches(chunk)
+            pending.append(executor.submit(validate_chunk, chunk, input_file, gear_fuzzy))
+            if len(pending) >= 2 * MAX_WORKERS:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+        
+    # Duplicates can span chunks, so they are checked over the whole file
+    validator.check_duplicates(pd.concat(duplicate_keys))
     
     # Generate report
     report_file = f"{input_file}.validation_report.json"
-    validator.generate_report(validated_df, report_file)
+    validator.generate_report(pd.concat(samples), report_file)
     
     # Save to staging if validation passed minimum threshold
-    if validator.valid_records / len(df) >= 0.90:  # 90% threshold
-        validator.save_to_staging(validated_df)
+    total_records = validator.valid_records + validator.invalid_records
+    if total_records and validator.valid_records / total_records >= MIN_VALID_RATE:
+        validator.conn.commit()
+        print(f"Successfully saved {saved} records to staging")
     else:
-        print("ERROR: Validation rate below 95% threshold. Data not loaded to staging.")
+        validator.conn.rollback()
+        print(f"ERROR: Validation rate below {MIN_VALID_RATE:.0%} threshold. Data not loaded to staging.")
         sys.exit(1)
 
 if __name__ == '__main__':